@@ -0,0 +1,12 @@
+import pytest
+
+from yatube.query_budget import TestRunner
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings):
+    """Те же настройки, что ставит TestRunner для manage.py test:
+    превышение бюджета запросов роняет тест, миниатюры готовятся
+    синхронно."""
+    for name, value in TestRunner.test_settings.items():
+        setattr(settings, name, value)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -8,6 +9,10 @@ class AboutViewsTests(TestCase):
         super().setUpClass()
         cls.client = Client()
 
+    def setUp(self):
+        # иначе страницу отдаст кэш анонимных страниц, без рендеринга
+        cache.clear()
+
     def test_about_pages_use_correct_template(self):
         templates_pages_names = {
             'about/author.html': reverse('about:author'),
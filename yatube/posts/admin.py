@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Group, Post
 
 
@@ -9,6 +10,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # полнотекстовый индекс вместо icontains по всей таблице
+        if not search_term:
+            return queryset, False
+        return search.search_posts(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 
@@ -18,6 +25,11 @@ class GroupAdmin(admin.ModelAdmin):
     search_fields = ('description',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.search_groups(queryset, search_term), False
+
 
 admin.site.register(Group, GroupAdmin)
 
@@ -0,0 +1,198 @@
+"""
+JSON API только для чтения: ленты, пост с комментариями и пакетная
+выборка постов по id.
+
+Ответы собираются из values(), без создания экземпляров моделей и без
+шаблонов. Параметр fields=id,text,... ограничивает набор полей (а
+ненужный подзапрос comment_count не выполняется), ленты листаются
+курсором из ответа: ?cursor=<next>.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import timeline
+from .models import Comment, Group, Post, User
+from .pagination import CursorPaginator
+
+# публичное имя поля -> путь в ORM
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+    'comment_count': 'comment_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+# нужны курсору, даже если клиент их не просил
+POST_CURSOR_FIELDS = ('pub_date', 'id')
+COMMENT_CURSOR_FIELDS = ('id',)
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_view(view):
+    """Представление возвращает dict, ошибки — через ApiError."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return JsonResponse(view(request, *args, **kwargs))
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+    return wrapper
+
+
+def selected_fields(request, available):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(available))
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.PAGINATOR_PAGES))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def serialize(rows, fields, available):
+    result = []
+    for row in rows:
+        item = {name: row[available[name]] for name in fields}
+        if 'image' in item:
+            item['image'] = (default_storage.url(item['image'])
+                             if item['image'] else None)
+        result.append(item)
+    return result
+
+
+def values(queryset, fields, available, extra=()):
+    # аннотации, не попавшие в values(), в SELECT не входят
+    paths = {available[name] for name in fields} | set(extra)
+    return queryset.values(*paths)
+
+
+def paginated(request, queryset, available, cursor_fields, ordering,
+              fields=None):
+    if fields is None:
+        fields = selected_fields(request, available)
+    rows = values(queryset, fields, available, extra=cursor_fields)
+    page = CursorPaginator(rows, get_limit(request),
+                           ordering=ordering).get_page(
+        request.GET.get('cursor'))
+    return {
+        'results': serialize(page, fields, available),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def feed(request, queryset):
+    return paginated(request, queryset, POST_FIELDS, POST_CURSOR_FIELDS,
+                     ('-pub_date', '-id'))
+
+
+def get_or_404(queryset, message, **lookup):
+    obj = queryset.filter(**lookup).first()
+    if obj is None:
+        raise ApiError(message, status=404)
+    return obj
+
+
+@api_view
+def index(request):
+    return feed(request, Post.objects.with_comment_count())
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_or_404(Group.objects.only('pk'), 'Группа не найдена',
+                       slug=slug)
+    return feed(request, group.posts.with_comment_count())
+
+
+@api_view
+def profile(request, username):
+    author = get_or_404(User.objects.only('pk'), 'Автор не найден',
+                        username=username)
+    return feed(request, author.posts.with_comment_count())
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', status=401)
+    fields = selected_fields(request, POST_FIELDS)
+    posts = values(Post.objects.with_comment_count(), fields, POST_FIELDS,
+                   extra=POST_CURSOR_FIELDS)
+    page = timeline.cursor_page(request.user, request.GET.get('cursor'),
+                                get_limit(request), posts)
+    return {
+        'results': serialize(page, fields, POST_FIELDS),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = selected_fields(request, POST_FIELDS)
+    rows = values(Post.objects.with_comment_count().filter(pk=post_id),
+                  fields, POST_FIELDS)
+    found = serialize(rows, fields, POST_FIELDS)
+    if not found:
+        raise ApiError('Пост не найден', status=404)
+    post = found[0]
+    post['comments'] = paginated(
+        request, Comment.objects.filter(post_id=post_id), COMMENT_FIELDS,
+        COMMENT_CURSOR_FIELDS, ('id',), fields=list(COMMENT_FIELDS))
+    return post
+
+
+@api_view
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise ApiError('Пост не найден', status=404)
+    return paginated(request, Comment.objects.filter(post_id=post_id),
+                     COMMENT_FIELDS, COMMENT_CURSOR_FIELDS, ('id',))
+
+
+@api_view
+def posts_batch(request):
+    """Несколько постов по ?ids=1,2,3 одним запросом, в порядке ids."""
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk]
+    except ValueError:
+        raise ApiError('ids — список чисел через запятую')
+    if len(ids) > settings.API_MAX_LIMIT:
+        raise ApiError(f'Не больше {settings.API_MAX_LIMIT} id за раз')
+    fields = selected_fields(request, POST_FIELDS)
+    rows = values(Post.objects.with_comment_count().filter(pk__in=ids),
+                  fields, POST_FIELDS, extra=('id',))
+    by_id = {row['id']: row for row in rows}
+    found = [by_id[pk] for pk in dict.fromkeys(ids) if pk in by_id]
+    return {'results': serialize(found, fields, POST_FIELDS),
+            'missing': [pk for pk in dict.fromkeys(ids) if pk not in by_id]}
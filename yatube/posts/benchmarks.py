@@ -0,0 +1,181 @@
+"""
+Нагрузочный прогон представлений posts на синтетических данных.
+
+seed() наполняет базу пользователями, группами, постами, подписками и
+комментариями: объекты собирает mixer без сохранения, в базу они
+попадают через bulk_create. Популярность авторов и число комментариев
+распределены по степенному закону, как на живом сайте: у немногих
+авторов много подписчиков, у большинства — единицы.
+
+run() измеряет задержку и число запросов к базе для каждого
+представления и возвращает словарь, пригодный для json.dumps, чтобы
+результаты разных коммитов можно было сравнивать.
+"""
+import io
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import Mixer
+
+from . import timeline
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 500
+PERCENTILES = (50, 95, 99)
+
+
+def zipf_weights(count, exponent):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def seed(users=200, groups=10, posts=5000, follows=20, comments=3,
+         exponent=1.2, random_seed=0):
+    """
+    Создать набор данных. follows и comments — средние числа подписок
+    на пользователя и комментариев на пост.
+    """
+    rng = random.Random(random_seed)
+    mixer = Mixer(commit=False)
+    # тексты, даты и прочие поля mixer берёт из faker: без зерна набор
+    # данных от запуска к запуску разный
+    mixer.faker.seed_instance(random_seed)
+    with transaction.atomic():
+        User.objects.bulk_create(
+            mixer.cycle(users).blend(
+                User, username=mixer.sequence('bench_user_{0}')),
+            batch_size=BATCH_SIZE)
+        Group.objects.bulk_create(
+            mixer.cycle(groups).blend(
+                Group, slug=mixer.sequence('bench-group-{0}')),
+            batch_size=BATCH_SIZE)
+        user_ids = list(User.objects.filter(
+            username__startswith='bench_user_').values_list('pk', flat=True))
+        group_ids = list(Group.objects.filter(
+            slug__startswith='bench-group-').values_list('pk', flat=True))
+        # первые по порядку пользователи и группы — самые популярные
+        popularity = zipf_weights(len(user_ids), exponent)
+        group_popularity = zipf_weights(len(group_ids), exponent)
+
+        authors = rng.choices(user_ids, weights=popularity, k=posts)
+        post_groups = rng.choices(group_ids + [None],
+                                  weights=group_popularity + [1], k=posts)
+        Post.objects.bulk_create(
+            (mixer.blend(Post, author_id=author_id, group_id=group_id)
+             for author_id, group_id in zip(authors, post_groups)),
+            batch_size=BATCH_SIZE)
+
+        pairs = set()
+        for user_id in user_ids:
+            wanted = min(int(rng.paretovariate(exponent) * follows / 2),
+                         len(user_ids) - 1)
+            for author_id in rng.choices(user_ids, weights=popularity,
+                                         k=wanted):
+                if author_id != user_id:
+                    pairs.add((user_id, author_id))
+        Follow.objects.bulk_create(
+            (Follow(user_id=user_id, author_id=author_id)
+             for user_id, author_id in pairs),
+            batch_size=BATCH_SIZE)
+
+        post_ids = list(Post.objects.filter(
+            author_id__in=user_ids).values_list('pk', flat=True))
+        Comment.objects.bulk_create(
+            (mixer.blend(Comment, post_id=post_id,
+                         author_id=rng.choice(user_ids))
+             for post_id in post_ids
+             for _ in range(int(rng.paretovariate(exponent) * comments / 2))),
+            batch_size=BATCH_SIZE)
+
+    # bulk_create не шлёт сигналов: счётчики, ленты и поиск строим сами
+    call_command('reconcile_author_stats', stdout=io.StringIO())
+    for follow in Follow.objects.filter(user_id__in=user_ids).iterator():
+        timeline.backfill(follow)
+    call_command('rebuild_search_index', stdout=io.StringIO())
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': len(post_ids),
+        'follows': len(pairs),
+        'comments': Comment.objects.filter(post_id__in=post_ids).count(),
+    }
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[index]
+
+
+def measure(client, method, url, data=None, repeat=20, warm=False):
+    """Время ответа в миллисекундах и число запросов к базе."""
+    timings, queries = [], []
+    if warm:
+        getattr(client, method)(url, data)
+    for _ in range(repeat):
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise AssertionError(
+                f'{method.upper()} {url}: {response.status_code}')
+        queries.append(len(captured))
+    result = {
+        'requests': repeat,
+        'mean_ms': round(sum(timings) / repeat, 3),
+        'queries_min': min(queries),
+        'queries_max': max(queries),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(timings, percent), 3)
+    return result
+
+
+def scenarios():
+    """Представление -> (метод, url, данные, пользователь или None)."""
+    reader = User.objects.annotate(
+        following_total=Count('follower')).order_by('-following_total')[0]
+    author = User.objects.annotate(
+        followers_total=Count('following')).order_by('-followers_total')[0]
+    group = Group.objects.annotate(
+        posts_total=Count('posts')).order_by('-posts_total')[0]
+    post = Post.objects.annotate(
+        comments_total=Count('comments')).order_by('-comments_total')[0]
+    post_kwargs = {'username': post.author.username, 'post_id': post.pk}
+    return {
+        'index': ('get', reverse('index'), None, None),
+        'group_posts': ('get', reverse('group', args=[group.slug]),
+                        None, None),
+        'profile': ('get', reverse('profile', args=[author.username]),
+                    None, None),
+        'post_view': ('get', reverse('post', kwargs=post_kwargs),
+                      None, None),
+        'follow_index': ('get', reverse('follow_index'), None, reader),
+        'add_comment': ('post', reverse('add_comment', kwargs=post_kwargs),
+                        {'text': 'Комментарий из бенчмарка'}, reader),
+        'new_post': ('post', reverse('new_post'),
+                     {'text': 'Пост из бенчмарка'}, reader),
+    }
+
+
+def run(repeat=20, warm=False, views=None):
+    results = {}
+    for name, (method, url, data, user) in scenarios().items():
+        if views and name not in views:
+            continue
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        results[name] = measure(client, method, url, data,
+                                repeat=repeat, warm=warm)
+    return results
@@ -0,0 +1,228 @@
+"""
+Кэш страниц с инвалидацией по поколениям.
+
+Каждая область (вся лента, группа, автор) имеет счётчик-поколение в кэше.
+Ключ закэшированной страницы включает поколения областей, от которых она
+зависит, поэтому запись поста, комментария или группы увеличивает нужные
+счётчики и старые страницы просто перестают находиться, а без изменений
+страница живёт PAGE_CACHE_TIMEOUT. Рядом с поколением хранится время
+последнего сдвига (changed_at) — для Last-Modified лент.
+
+AnonymousPageCacheMiddleware кэширует целые страницы для анонимных GET
+к представлениям из PAGE_CACHE_MODULES. Запись свежая PAGE_CACHE_SOFT_TTL
+и пока не сдвинулись поколения её областей, а хранится до
+PAGE_CACHE_HARD_TTL. Устаревшую страницу пересчитывает один запрос,
+взявший блокировку в кэше (cache.add), остальные тем временем получают
+старую — истечение записи не превращается в лавину одинаковых рендеров.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (get_cache_key, learn_cache_key,
+                                patch_vary_headers)
+
+GLOBAL = 'global'
+GROUPS = 'groups'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def _generation_key(scope):
+    return f'generation:{scope}'
+
+
+def get_generations(scopes):
+    """Вернуть поколения областей, заводя отсутствующие счётчики."""
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    generations = []
+    for key in keys:
+        if key not in found:
+            # после вытеснения счётчик не должен повторить старое значение
+            cache.add(key, int(time.time() * 1000), None)
+            found[key] = cache.get(key)
+        generations.append(found[key])
+    return generations
+
+
+def _changed_key(scope):
+    return f'changed:{scope}'
+
+
+def changed_at(scope):
+    """Время (timestamp) последнего сдвига поколения области. Без
+    отметки — после вытеснения — считается, что область изменилась
+    сейчас: лишний полный ответ лучше ложного 304."""
+    key = _changed_key(scope)
+    changed = cache.get(key)
+    if changed is None:
+        cache.add(key, time.time(), None)
+        changed = cache.get(key)
+    return changed
+
+
+def _bump(scopes):
+    now = time.time()
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(now * 1000), None)
+    cache.set_many({_changed_key(scope): now for scope in scopes}, None)
+
+
+def bump(*scopes):
+    """
+    Сдвинуть поколения областей, сделав их страницы устаревшими.
+
+    Внутри транзакции поколения сдвигаются ещё раз после фиксации:
+    читатель, успевший между первым сдвигом и COMMIT закэшировать
+    страницу со старыми данными под новым поколением, иначе отдавал бы
+    её до PAGE_CACHE_TIMEOUT.
+    """
+    scopes = set(scopes)
+    _bump(scopes)
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def generation_prefix(scopes):
+    scopes = sorted(set(scopes))
+    raw = '|'.join(f'{scope}={generation}' for scope, generation
+                   in zip(scopes, get_generations(scopes)))
+    return 'pages.' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_page_by_generation(get_scopes):
+    """
+    Аналог cache_page, у которого ключ зависит от поколений областей,
+    возвращаемых get_scopes(request, *args, **kwargs). Части страницы,
+    зависящие от зрителя, — дырки posts.holes, так что страница одна и
+    для гостей, и для вошедших; если шаблон всё же прочитал сессию,
+    страница кэшируется отдельно для каждой Cookie.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key_prefix = generation_prefix(get_scopes(request, *args,
+                                                      **kwargs))
+            cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+            if cache_key is not None:
+                response = cache.get(cache_key)
+                if response is not None:
+                    return response
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            if getattr(request, 'session', None) is not None and (
+                    request.session.accessed):
+                # страница зависит от пользователя: не отдавать её чужим
+                patch_vary_headers(response, ('Cookie',))
+            timeout = settings.PAGE_CACHE_TIMEOUT
+            cache_key = learn_cache_key(request, response, timeout,
+                                        key_prefix, cache=cache)
+            cache.set(cache_key, response, timeout)
+            return response
+        # по ним AnonymousPageCacheMiddleware узнаёт поколения страницы
+        wrapper.cache_scopes = get_scopes
+        return wrapper
+    return decorator
+
+
+stats = {'hits': 0, 'misses': 0, 'stale': 0}
+
+
+def _page_key(request):
+    url = request.build_absolute_uri()
+    return 'anonymous_page.' + hashlib.md5(url.encode()).hexdigest()
+
+
+def _is_cacheable(response):
+    return (response.status_code == 200 and not response.streaming
+            and not response.cookies
+            and not response.has_header('Set-Cookie')
+            and 'private' not in response.get('Cache-Control', '')
+            and 'no-store' not in response.get('Cache-Control', ''))
+
+
+class AnonymousPageCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        page_cache = getattr(request, '_page_cache', None)
+        if page_cache is None:
+            return response
+        key, version, owns_lock = page_cache
+        try:
+            if _is_cacheable(response) and not request.META.get(
+                    'CSRF_COOKIE_USED'):
+                cache.set(key, {
+                    'response': response,
+                    'version': version,
+                    'fresh_until': time.time() + settings.PAGE_CACHE_SOFT_TTL,
+                }, settings.PAGE_CACHE_HARD_TTL)
+        finally:
+            if owns_lock:
+                cache.delete(key + '.lock')
+        return response
+
+    def process_view(self, request, view, args, kwargs):
+        if (request.method != 'GET'
+                or settings.SESSION_COOKIE_NAME in request.COOKIES
+                or view.__module__ not in settings.PAGE_CACHE_MODULES):
+            return None
+        get_scopes = getattr(view, 'cache_scopes', None)
+        version = get_scopes and generation_prefix(
+            get_scopes(request, *args, **kwargs))
+        key = _page_key(request)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version and (
+                entry['fresh_until'] > time.time()):
+            stats['hits'] += 1
+            return entry['response']
+        owns_lock = cache.add(key + '.lock', 1, settings.PAGE_CACHE_LOCK_TTL)
+        if not owns_lock and entry is not None:
+            # страницу уже пересчитывают, пока отдаём старую
+            stats['stale'] += 1
+            return entry['response']
+        if not owns_lock:
+            # старой страницы нет: ждём, пока её построит другой запрос
+            deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(key)
+                if entry is not None:
+                    stats['hits'] += 1
+                    return entry['response']
+                # блокировка снята без записи (ответ не кэшируется):
+                # дальше ждать нечего, строим страницу сами
+                owns_lock = cache.add(key + '.lock', 1,
+                                      settings.PAGE_CACHE_LOCK_TTL)
+                if owns_lock:
+                    break
+        stats['misses'] += 1
+        request._page_cache = (key, version, owns_lock)
+        return None
+
+
+def collect_metrics():
+    """Счётчики AnonymousPageCacheMiddleware для yatube.metrics."""
+    return [(f'yatube_page_cache_{key}_total',
+             f'Анонимный кэш страниц: {key}', value)
+            for key, value in stats.items()]
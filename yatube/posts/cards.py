@@ -0,0 +1,67 @@
+"""
+Кэш отрисованных карточек постов.
+
+Карточка не зависит от зрителя и кэшируется по ключу из id поста и хэша
+её содержимого (текст, картинка, группа, автор, число комментариев):
+правка поста, новый комментарий или переименование группы дают новый
+ключ. Место кнопки «Редактировать» (EDIT_SLOT) становится дыркой
+posts.holes: кнопку для автора подставит HoleMiddleware, поэтому и
+страница с карточками не зависит от зрителя. Карточки страницы читаются
+одним get_many.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import holes, thumbnails
+
+CARD_TEMPLATE = 'includes/post_item.html'
+EDIT_SLOT = '<!-- post-edit -->'
+
+
+def card_key(post):
+    group = post.group
+    content = '\x00'.join(str(value) for value in (
+        post.text,
+        post.image.name if post.image else '',
+        post.image_width,
+        post.image_height,
+        post.pub_date.isoformat(),
+        post.author.username,
+        group.slug if group else '',
+        group.title if group else '',
+        getattr(post, 'comment_count', ''),
+    ))
+    digest = hashlib.md5(content.encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def render_cards(posts):
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    missing = [post.image.name for post, key in zip(posts, keys)
+               if key not in cached and post.image]
+    urls = thumbnails.get_urls(missing, thumbnails.card_geometry())
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = cached.get(key)
+        if card is None:
+            url = urls.get(post.image.name) if post.image else None
+            card = render_to_string(CARD_TEMPLATE, {
+                'post': post,
+                'thumbnail_url': url,
+                'thumbnail_size': url and thumbnails.card_size(post),
+            })
+            if url or not post.image:
+                # карточку с заглушкой вместо миниатюры не кэшируем
+                rendered[key] = card
+        cards.append(card.replace(EDIT_SLOT, holes.marker(
+            'edit', post.pk, post.author.username), 1))
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(''.join(cards))
@@ -0,0 +1,156 @@
+"""
+RSS- и Atom-ленты: вся лента, группа и автор.
+
+Читалки опрашивают ленты часто, поэтому ответ условный: ETag строится
+по последнему посту области (один запрос по индексу) и поколению её
+кэша (posts.cache), которое сдвигается при правке и удалении постов,
+комментариях и переименовании групп, а Last-Modified — по времени
+последнего сдвига этого поколения. Если ничего не изменилось,
+отдаётся 304 без выборки постов и рендеринга.
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from . import cache
+from .models import Group, Post, User
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related(
+            'author', 'group')[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(50)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('post', kwargs={'username': item.author.username,
+                                       'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('group', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи автора {obj.username}'
+
+    def link(self, obj):
+        return reverse('profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def _scope(**kwargs):
+    """Посты области и её поколение кэша по аргументам адреса."""
+    if 'slug' in kwargs:
+        return (Post.objects.filter(group__slug=kwargs['slug']),
+                cache.group_scope(kwargs['slug']))
+    if 'username' in kwargs:
+        return (Post.objects.filter(author__username=kwargs['username']),
+                cache.author_scope(kwargs['username']))
+    return Post.objects.all(), cache.GLOBAL
+
+
+def _latest(request, **kwargs):
+    # etag и last_modified спрашивают одно и то же — считаем один раз
+    if not hasattr(request, '_feed_latest'):
+        posts, scope = _scope(**kwargs)
+        latest = posts.order_by('-pub_date').values_list(
+            'pk', flat=True).first()
+        generation = cache.get_generations([scope])[0]
+        changed = datetime.fromtimestamp(cache.changed_at(scope),
+                                         timezone.utc)
+        request._feed_latest = latest and (latest, generation, changed)
+    return request._feed_latest
+
+
+def feed_etag(request, **kwargs):
+    latest = _latest(request, **kwargs)
+    return latest and f'{latest[0]}-{latest[1]}'
+
+
+def feed_last_modified(request, **kwargs):
+    # pub_date последнего поста не видит правок и комментариев, а после
+    # удаления поста откатывается назад
+    latest = _latest(request, **kwargs)
+    return latest and latest[2]
+
+
+def conditional(feed):
+    def view(request, *args, **kwargs):
+        response = feed(request, *args, **kwargs)
+        # Feed ставит Last-Modified по последней записи, а condition не
+        # заменяет готовый заголовок
+        del response['Last-Modified']
+        return response
+    return condition(etag_func=feed_etag,
+                     last_modified_func=feed_last_modified)(view)
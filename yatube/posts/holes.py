@@ -0,0 +1,119 @@
+"""
+Дырки в кэшируемых страницах.
+
+Части страницы, зависящие от зрителя (шапка, вкладки ленты, кнопки
+подписки и редактирования), при рендеринге заменяются метками
+<!--hole:имя:аргументы-->, поэтому остальная страница одна для всех и
+кэшируется один раз. HoleMiddleware перед отдачей заполняет метки
+фрагментами для текущего пользователя. Пользовательский текст
+экранируется шаблонами, подделать метку им нельзя.
+"""
+import hashlib
+import json
+import re
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Follow
+
+MARKER_PREFIX = b'<!--hole:'
+_MARKER = re.compile(r'<!--hole:(\w+)((?::[^:<>]*)*)-->')
+
+FRAGMENTS = {}
+
+
+def marker(name, *args):
+    # '-' экранируем, чтобы аргумент не сливался с концом комментария
+    encoded = ''.join(':' + quote(str(arg), safe='').replace('-', '%2D')
+                      for arg in args)
+    return mark_safe(f'<!--hole:{name}{encoded}-->')
+
+
+def fragment(name):
+    """Функция дырки по запросу и аргументам метки возвращает (шаблон,
+    контекст) или None, если подставлять нечего."""
+    def register(func):
+        FRAGMENTS[name] = func
+        return func
+    return register
+
+
+def viewer(request):
+    user = request.user
+    return {'is_authenticated': user.is_authenticated,
+            'username': user.username}
+
+
+@fragment('nav')
+def nav(request):
+    return 'includes/nav.html', {'user': viewer(request)}
+
+
+@fragment('menu')
+def menu(request, active):
+    return 'includes/menu.html', {'user': viewer(request), active: True}
+
+
+@fragment('follow')
+def follow_button(request, username):
+    user = request.user
+    following = user.is_authenticated and Follow.objects.filter(
+        user=user, author__username=username).exists()
+    return ('includes/follow_button.html',
+            {'username': username, 'following': following})
+
+
+@fragment('edit')
+def edit_button(request, post_id, username):
+    if request.user.username != username:
+        return None
+    return ('includes/post_edit.html',
+            {'post': {'id': post_id, 'author': {'username': username}}})
+
+
+def _fragment_key(template, context):
+    raw = template + json.dumps(context, sort_keys=True)
+    return 'hole.' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _resolve(match, request):
+    render = FRAGMENTS.get(match.group(1))
+    if render is None:
+        return None
+    args = [unquote(arg) for arg in match.group(2).split(':')[1:]]
+    found = render(request, *args)
+    return found and (_fragment_key(*found), *found)
+
+
+def fill(content, request):
+    """Подставить фрагменты зрителя. Контекст фрагмента — простые
+    значения, поэтому готовый HTML кэшируется по нему: одинаковые
+    фрагменты разных страниц и пользователей не рендерятся заново."""
+    found = [_resolve(match, request) for match in _MARKER.finditer(content)]
+    rendered = cache.get_many({item[0] for item in found if item})
+    missing = {key: render_to_string(template, context)
+               for key, template, context in filter(None, found)
+               if key not in rendered}
+    if missing:
+        cache.set_many(missing, settings.HOLE_CACHE_TIMEOUT)
+        rendered.update(missing)
+    replacements = iter(rendered[item[0]] if item else '' for item in found)
+    return _MARKER.sub(lambda match: next(replacements), content)
+
+
+class HoleMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (not response.streaming
+                and 'text/html' in response.get('Content-Type', '')
+                and MARKER_PREFIX in response.content):
+            response.content = fill(
+                response.content.decode(response.charset), request)
+        return response
@@ -0,0 +1,66 @@
+"""
+Обработка картинок постов при загрузке.
+
+Оригинал с телефона может весить десятки мегабайт и лежать боком.
+Перед сохранением картинка поворачивается по EXIF, уменьшается до
+POST_IMAGE_MAX_SIZE и перекодируется в POST_IMAGE_FORMAT с качеством
+POST_IMAGE_QUALITY; метаданные (в том числе геопозиция) при этом
+отбрасываются. Размеры результата записываются в пост, чтобы их не
+приходилось узнавать, открывая файл.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def output_format(has_alpha):
+    image_format = settings.POST_IMAGE_FORMAT
+    if image_format == 'WEBP' and not features.check('webp'):
+        image_format = 'JPEG'
+    if image_format == 'JPEG' and has_alpha:
+        return 'PNG'
+    return image_format
+
+
+def normalize(file):
+    """
+    Вернуть (ContentFile или None, ширина, высота). None — картинку
+    оставить как есть: анимацию при перекодировании потеряли бы.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    if getattr(image, 'is_animated', False):
+        return None, image.width, image.height
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    image_format = output_format(has_alpha)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    output = io.BytesIO()
+    image.save(output, image_format, quality=settings.POST_IMAGE_QUALITY,
+               optimize=True)
+    name = '{}.{}'.format(os.path.splitext(os.path.basename(file.name))[0],
+                          EXTENSIONS[image_format])
+    return ContentFile(output.getvalue(), name=name), image.width, image.height
+
+
+def process(post):
+    """Подменить только что загруженную картинку поста обработанной."""
+    try:
+        content, width, height = normalize(post.image.file)
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        logger.warning('Не удалось обработать картинку %s', post.image.name,
+                       exc_info=True)
+        return
+    if content is not None:
+        post.image = content
+    post.image_width, post.image_height = width, height
@@ -0,0 +1,69 @@
+"""
+Хранилище ключей sorl-thumbnail с LRU в памяти процесса.
+
+Штатное cached_db-хранилище ходит в общий кэш (а при промахе в базу) за
+каждым ключом. Здесь перед ним стоит ограниченный LRU на
+THUMBNAIL_KVSTORE_LRU_SIZE записей: повторные обращения к тем же
+картинкам не покидают процесс. Отсутствующие ключи тоже запоминаются,
+чтобы промах не повторялся. Записи живут не дольше
+THUMBNAIL_KVSTORE_LRU_TIMEOUT: их могли изменить другие процессы.
+
+Подключается настройкой THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+
+_MISSING = object()
+
+stats = {'hits': 0, 'negative_hits': 0, 'misses': 0}
+
+
+class KVStore(CachedDBStore):
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+
+    def _remember(self, key, value):
+        expires = time.monotonic() + settings.THUMBNAIL_KVSTORE_LRU_TIMEOUT
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.THUMBNAIL_KVSTORE_LRU_SIZE:
+                self._entries.popitem(last=False)
+
+    def _forget(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def _get_raw(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                value = entry[1]
+                if value is _MISSING:
+                    stats['negative_hits'] += 1
+                    return None
+                stats['hits'] += 1
+                return value
+            stats['misses'] += 1
+        value = super()._get_raw(key)
+        self._remember(key, _MISSING if value is None else value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        self._forget(*keys)
+
+    def clear(self, delete_thumbnails=False):
+        super().clear(delete_thumbnails)
+        with self._lock:
+            self._entries.clear()
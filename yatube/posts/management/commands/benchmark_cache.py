@@ -0,0 +1,74 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'sqlite': 'yatube.cache_backends.SQLiteCache',
+}
+
+
+def run_worker(args):
+    backend, location, operations, keys, write_ratio, seed = args
+    cache = import_string(BACKENDS[backend])(
+        location, {'OPTIONS': {'MAX_ENTRIES': keys * 2}})
+    rng = random.Random(seed)
+    value = 'x' * 2048
+    hits = misses = 0
+    started = time.perf_counter()
+    for _ in range(operations):
+        key = f'page:{int(rng.paretovariate(1.2)) % keys}'
+        if rng.random() < write_ratio:
+            cache.set(key, value)
+        elif cache.get(key) is None:
+            misses += 1
+            cache.set(key, value)
+        else:
+            hits += 1
+    return time.perf_counter() - started, hits, misses
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает LocMemCache и общий SQLiteCache под нагрузкой '
+            'из нескольких процессов и печатает результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--operations', type=int, default=20000,
+                            help='операций на процесс')
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--write-ratio', type=float, default=0.05)
+        parser.add_argument('--backend', choices=sorted(BACKENDS),
+                            action='append')
+
+    def handle(self, *args, **options):
+        results = []
+        context = multiprocessing.get_context('fork')
+        for backend in options['backend'] or sorted(BACKENDS):
+            with tempfile.TemporaryDirectory() as directory:
+                location = os.path.join(directory, 'cache.sqlite3')
+                tasks = [(backend, location, options['operations'],
+                          options['keys'], options['write_ratio'], seed)
+                         for seed in range(options['processes'])]
+                started = time.perf_counter()
+                with context.Pool(options['processes']) as pool:
+                    stats = pool.map(run_worker, tasks)
+                elapsed = time.perf_counter() - started
+            hits = sum(hit for _, hit, _ in stats)
+            misses = sum(miss for _, _, miss in stats)
+            total = options['operations'] * options['processes']
+            results.append({
+                'backend': backend,
+                'processes': options['processes'],
+                'operations': total,
+                'seconds': round(elapsed, 3),
+                'ops_per_second': round(total / elapsed),
+                'hit_rate': round(hits / max(hits + misses, 1), 4),
+            })
+        self.stdout.write(json.dumps(results, indent=2))
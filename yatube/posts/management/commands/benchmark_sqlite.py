@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import Client
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from posts import benchmarks
+from posts.models import Post, User
+
+
+def read_feed(stop):
+    """Читать первую страницу ленты до stop, вернуть задержки в мс."""
+    latencies = []
+    try:
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            list(Post.objects.for_feed()[:settings.PAGINATOR_PAGES])
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+    return latencies
+
+
+def write_posts(stop, user):
+    """Публиковать посты через new_post до stop: (успешно, ошибок)."""
+    client = Client()
+    client.force_login(user)
+    written = failed = 0
+    try:
+        while time.monotonic() < stop:
+            try:
+                response = client.post(reverse('new_post'),
+                                       {'text': 'Запись под нагрузкой'})
+                written += response.status_code == 302
+            except OperationalError:
+                failed += 1
+    finally:
+        connection.close()
+    return written, failed
+
+
+def contend(readers, writers, duration):
+    stop = time.monotonic() + duration
+    latencies, writes = [], []
+    authors = list(User.objects.order_by('pk')[:writers])
+
+    def run(target, args, results):
+        results.append(target(*args))
+
+    threads = [threading.Thread(target=run, args=(read_feed, (stop,),
+                                                  latencies))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=run, args=(write_posts,
+                                                   (stop, author), writes))
+                for author in authors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reads = [value for values in latencies for value in values]
+    return {
+        'reads': len(reads),
+        'read_p50_ms': round(benchmarks.percentile(reads, 50), 2),
+        'read_p99_ms': round(benchmarks.percentile(reads, 99), 2),
+        'read_max_ms': round(max(reads), 2),
+        'writes': sum(written for written, _ in writes),
+        'write_errors': sum(failed for _, failed in writes),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает обычный и продакшен-режим SQLite (SQLITE_PRODUCTION) '
+            'на отдельной базе в файле: читатели листают ленту, пока '
+            'писатели публикуют посты через new_post. Печатает задержки '
+            'чтения и число записей и ошибок в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5,
+                            help='секунд нагрузки на каждый режим')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='записать JSON в файл')
+
+    def run_mode(self, production, options):
+        test_settings = connection.settings_dict['TEST']
+        old_name = connection.settings_dict['NAME']
+        old_test_name = test_settings.get('NAME')
+        # в памяти у каждого потока была бы своя база, нужен файл
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+                SQLITE_PRODUCTION=production):
+            test_settings['NAME'] = os.path.join(directory, 'bench.sqlite3')
+            connection.creation.create_test_db(verbosity=0,
+                                               autoclobber=True)
+            try:
+                benchmarks.seed(users=options['users'], groups=5,
+                                posts=options['posts'], follows=5,
+                                comments=1, random_seed=options['seed'])
+                return contend(options['readers'], options['writers'],
+                               options['duration'])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = old_test_name
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            results = {mode: self.run_mode(mode == 'production', options)
+                       for mode in ('default', 'production')}
+        finally:
+            teardown_test_environment()
+        report = json.dumps({
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'duration': options['duration'],
+            'modes': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        self.stdout.write(report)
@@ -0,0 +1,70 @@
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmarks
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Наполняет отдельную тестовую базу синтетическими данными, '
+            'замеряет задержку и число запросов представлений posts и '
+            'печатает результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='в среднем подписок на пользователя')
+        parser.add_argument('--comments', type=int, default=3,
+                            help='в среднем комментариев на пост')
+        parser.add_argument('--exponent', type=float, default=1.2,
+                            help='показатель степенного распределения')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warm', action='store_true',
+                            help='не сбрасывать кэш между запросами')
+        parser.add_argument('--view', action='append',
+                            help='замерить только это представление')
+        parser.add_argument('--output', help='записать JSON в файл')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            dataset = benchmarks.seed(
+                users=options['users'], groups=options['groups'],
+                posts=options['posts'], follows=options['follows'],
+                comments=options['comments'], exponent=options['exponent'],
+                random_seed=options['seed'])
+            results = benchmarks.run(repeat=options['repeat'],
+                                     warm=options['warm'],
+                                     views=options['view'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report = json.dumps({
+            'commit': current_commit(),
+            'dataset': dataset,
+            'seed': options['seed'],
+            'cache': 'warm' if options['warm'] else 'cold',
+            'views': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        self.stdout.write(report)
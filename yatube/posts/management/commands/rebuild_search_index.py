@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from posts import search
+from posts.models import Group, Post
+
+SOURCES = {
+    search.POSTS_INDEX: (Post, ('text',)),
+    search.GROUPS_INDEX: (Group, ('title', 'description')),
+}
+
+
+class Command(BaseCommand):
+    help = ('Переиндексирует полнотекстовый поиск диапазонами id: каждая '
+            'пачка в своей транзакции, поэтому сайт не блокируется, а '
+            'прерванную перестройку можно продолжить с --start-id.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--start-id', type=int, default=0)
+        parser.add_argument('--index', choices=sorted(SOURCES),
+                            action='append')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Полнотекстовый поиск работает только '
+                               'на SQLite')
+        batch_size = options['batch_size']
+        for table in options['index'] or sorted(SOURCES):
+            model, fields = SOURCES[table]
+            last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            start = options['start_id']
+            indexed = 0
+            while start <= last_id:
+                end = start + batch_size
+                indexed += search.reindex_range(
+                    table, model.objects.all(), fields, start, end)
+                self.stdout.write(f'{table}: до id {end - 1}, '
+                                  f'проиндексировано {indexed}')
+                start = end
+            self.stdout.write(self.style.SUCCESS(
+                f'{table}: готово, записей {indexed}'))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import AuthorStats, Follow, Post, User
+
+
+def count_subquery(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def actual_counts():
+    """Истинные счётчики для UPDATE записей AuthorStats (pk = user_id)."""
+    return {
+        'posts_count': count_subquery(Post.objects, 'author'),
+        'followers_count': count_subquery(Follow.objects, 'author'),
+        'following_count': count_subquery(Follow.objects, 'user'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает AuthorStats и исправляет расхождения пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """
+        Счётчики пачки пересчитываются и записываются одним UPDATE:
+        инкремент из сигналов, зафиксированный во время работы команды,
+        не затирается значением, прочитанным раньше него.
+        """
+        batch_size = options['batch_size']
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        counts = actual_counts()
+        drifted = Q()
+        for field, value in counts.items():
+            drifted |= ~Q(**{field: value})
+        created = updated = 0
+        last_pk = 0
+        while True:
+            batch = list(user_ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            with transaction.atomic():
+                existing = set(AuthorStats.objects.filter(
+                    user_id__in=batch).values_list('user_id', flat=True))
+                missing = [pk for pk in batch if pk not in existing]
+                # нули: настоящие значения запишет UPDATE ниже
+                AuthorStats.objects.bulk_create(
+                    [AuthorStats(user_id=pk) for pk in missing],
+                    ignore_conflicts=True)
+                updated += AuthorStats.objects.filter(
+                    user_id__in=batch).filter(drifted).exclude(
+                    user_id__in=missing).update(**counts)
+                AuthorStats.objects.filter(user_id__in=missing).update(
+                    **counts)
+            created += len(missing)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано записей: {created}, исправлено: {updated}'))
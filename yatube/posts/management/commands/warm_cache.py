@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import AuthorStats, Group, Post
+
+
+def warm_page(url, base_url):
+    """Запросить страницу так, как её запросил бы посетитель base_url:
+    иначе ключи кэша будут для testserver и живой трафик их не найдёт."""
+    base = urlsplit(base_url)
+    return Client().get(url, HTTP_HOST=base.netloc,
+                        secure=base.scheme == 'https').status_code
+
+
+def in_thread(func):
+    """У потока пула своё соединение с базой, его нужно закрыть."""
+    def wrapper(item):
+        try:
+            return func(item)
+        finally:
+            connection.close()
+    return wrapper
+
+
+def run(func, items, concurrency):
+    if concurrency <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(in_thread(func), items))
+
+
+class Command(BaseCommand):
+    help = ('Прогревает кэш после деплоя или сброса: готовит миниатюры и '
+            'отрисовывает первые страницы главной, всех групп и самых '
+            'популярных профилей. Кэш LocMemCache у каждого процесса свой, '
+            'поэтому отдельной командой имеет смысл греть только общий '
+            'кэш (CACHE_LOCATION); воркер может прогреть себя сам через '
+            'WARM_CACHE_ON_STARTUP в wsgi.py.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3,
+                            help='сколько первых страниц каждой ленты')
+        parser.add_argument('--profiles', type=int, default=50,
+                            help='сколько профилей с наибольшим числом '
+                                 'подписчиков')
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help='одновременных запросов к базе')
+        parser.add_argument('--base-url', default=settings.WARM_CACHE_BASE_URL,
+                            help='схема и хост сайта, например '
+                                 'https://example.com')
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        usernames = list(AuthorStats.objects.order_by(
+            '-followers_count').values_list(
+                'user__username', flat=True)[:options['profiles']])
+        slugs = list(Group.objects.values_list('slug', flat=True))
+
+        feeds = [(reverse('index'), Post.objects.all())]
+        feeds += [(reverse('group', args=[slug]),
+                   Post.objects.filter(group__slug=slug)) for slug in slugs]
+        feeds += [(reverse('profile', args=[username]),
+                   Post.objects.filter(author__username=username))
+                  for username in usernames]
+
+        # миниатюры первыми: тогда страницы закэшируются уже с картинками
+        per_page = settings.PAGINATOR_PAGES
+        images, urls = set(), []
+        for url, posts in feeds:
+            images.update(name for name in posts.exclude(image='').exclude(
+                image=None).values_list('image', flat=True)[:pages * per_page])
+            existing = -(-posts.count() // per_page)
+            urls += [f'{url}?page={page}' if page > 1 else url
+                     for page in range(1, max(min(pages, existing), 1) + 1)]
+
+        concurrency = options['concurrency']
+        started = time.perf_counter()
+        run(thumbnails.generate, sorted(images), concurrency)
+        self.stdout.write(f'Миниатюры: {len(images)} картинок за '
+                          f'{time.perf_counter() - started:.1f} с')
+        started = time.perf_counter()
+        statuses = run(partial(warm_page, base_url=options['base_url']),
+                       urls, concurrency)
+        failed = [url for url, status in zip(urls, statuses) if status != 200]
+        self.stdout.write(f'Страницы: {len(urls) - len(failed)} за '
+                          f'{time.perf_counter() - started:.1f} с')
+        if failed:
+            self.stderr.write('Не удалось прогреть: ' + ', '.join(failed))
+        self.stdout.write(self.style.SUCCESS('Кэш прогрет'))
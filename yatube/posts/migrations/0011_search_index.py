@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# DDL и заполнение индексов на момент миграции — копия, а не импорт из
+# posts.search: миграция не должна меняться вместе с кодом приложения
+TOKENIZER = 'unicode61 remove_diacritics 2'
+INDEXES = {
+    'posts_post_fts': ('posts_post', ('text',)),
+    'posts_group_fts': ('posts_group', ('title', 'description')),
+}
+
+
+def normalized(column):
+    # как search.normalize: регистр сворачивает токенизатор, «ё» -> «е»
+    return f"replace(replace({column}, 'Ё', 'Е'), 'ё', 'е')"
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, (source, columns) in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"{', '.join(columns)}, tokenize='{TOKENIZER}')")
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+            f"SELECT id, {', '.join(map(normalized, columns))} FROM {source}")
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in INDEXES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.6 on 2026-10-17 04:30
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from PIL import Image
+
+
+def fill_image_sizes(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').exclude(image=None)
+    for post in posts.only('pk', 'image').iterator():
+        try:
+            with default_storage.open(post.image.name) as file:
+                width, height = Image.open(file).size
+        except (OSError, SyntaxError):
+            continue
+        Post.objects.filter(pk=post.pk).update(image_width=width,
+                                               image_height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_image_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.6 on 2026-10-17 09:12
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def count_subquery(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def create_missing_stats(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    missing = User.objects.filter(stats__isnull=True).annotate(
+        posts_count=count_subquery(Post.objects, 'author'),
+        followers_count=count_subquery(Follow.objects, 'author'),
+        following_count=count_subquery(Follow.objects, 'user'),
+    ).values_list('pk', 'posts_count', 'followers_count', 'following_count')
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk, posts_count=posts,
+                     followers_count=followers, following_count=following)
+         for pk, posts, followers, following in missing.iterator()),
+        batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_timeline_cursor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_stats, migrations.RunPython.noop),
+    ]
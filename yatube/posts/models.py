@@ -1,6 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
 from django.db.models.fields.related import ForeignKey
+from django.db.models.functions import Coalesce
+
+from . import images
 
 User = get_user_model()
 
@@ -15,6 +19,34 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def with_comment_count(self):
+        """Число комментариев поста подзапросом, без JOIN и GROUP BY."""
+        comments = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(count=Count('pk')).values('count')
+        return self.annotate(comment_count=Coalesce(
+            Subquery(comments, output_field=IntegerField()), 0))
+
+    def for_feed(self):
+        """
+        Посты для ленты: автор и группа в том же запросе, число
+        комментариев — подзапросом, без тяжёлых колонок, не нужных карточке.
+        """
+        return self.select_related('author', 'group').defer(
+            'author__password', 'group__description'
+        ).with_comment_count()
+
+    def count(self):
+        # с аннотациями Django оборачивает COUNT(*) в подзапрос с
+        # GROUP BY id и считает comment_count для каждой строки;
+        # число строк от аннотаций не зависит, считаем по id
+        if self._result_cache is None and self.query.annotations:
+            return self.model._base_manager.filter(
+                pk__in=self.values('pk')).count()
+        return super().count()
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст',
                             help_text='Введите текст')
@@ -29,12 +61,42 @@ class Post(models.Model):
     image = models.ImageField(upload_to='posts/', blank=True, null=True,
                               verbose_name='Изображение',
                               help_text='Добавьте картинку')
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    def store_image(self):
+        """
+        Обработать только что загруженную картинку и сохранить её в
+        хранилище. True, если файл сохранён сейчас.
+        """
+        if not self.image or self.image._committed:
+            return False
+        images.process(self)
+        self.image.save(self.image.name, self.image.file, save=False)
+        return True
+
+    def save(self, *args, **kwargs):
+        self.store_image()
+        # счётчики AuthorStats обновляются в той же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('-pub_date',)
+        # под ленты: главная, автора и группы, новые записи сверху
+        indexes = [
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_pub_date'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='post_author_pub_date'),
+            models.Index(fields=('group', '-pub_date'),
+                         name='post_group_pub_date'),
+        ]
 
 
 class Comment(models.Model):
@@ -50,6 +112,9 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('pk',)
+        indexes = [
+            models.Index(fields=('post', 'id'), name='comment_post_id'),
+        ]
 
 
 class Follow(models.Model):
@@ -62,3 +127,63 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=('user', 'author'),
                                     name='unique_list')
         ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class AuthorStatsManager(models.Manager):
+    def for_user(self, user):
+        """
+        Счётчики автора. Запись заводится вместе с пользователем, чтение
+        ничего не пишет: без записи отдаются нули.
+        """
+        return self.filter(user=user).first() or self.model(user=user)
+
+    def increment(self, user_id, **deltas):
+        """
+        Сдвинуть счётчики F-выражением. Отсутствующую запись не создаём:
+        её восстановит reconcile_author_stats.
+        """
+        self.filter(user_id=user_id).update(**{
+            field: F(field) + delta for field, delta in deltas.items()
+        })
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats')
+    posts_count = models.IntegerField('Записей', default=0)
+    followers_count = models.IntegerField('Подписчиков', default=0)
+    following_count = models.IntegerField('Подписок', default=0)
+
+    objects = AuthorStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class TimelineEntry(models.Model):
+    """
+    Материализованная лента подписок: запись на каждый пост автора,
+    на которого подписан user. pub_date продублирован из поста, чтобы
+    лента читалась одним проходом по индексу (user, pub_date, post);
+    post в индексе — для однозначного порядка курсорной навигации.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey('Post', on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='timeline_user_pub_date_post'),
+        ]
@@ -0,0 +1,181 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorPaginator(Paginator):
+    """
+    Постраничная навигация по ключу (keyset) вместо OFFSET.
+
+    Страница выбирается условием по полям сортировки ``ordering``
+    относительно последней показанной записи, поэтому стоимость любой
+    страницы — один проход по индексу, независимо от её глубины.
+    Общее число записей не считается.
+
+    hydrate превращает строки страницы в показываемые объекты: так можно
+    листать узкую таблицу ключей (например, ленту подписок) и выбирать
+    посты одним запросом, а курсоры считать по самим строкам.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id'),
+                 hydrate=None):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+        self.hydrate = hydrate
+
+    # номеров страниц и общего числа записей у курсора нет: унаследованный
+    # код Paginator, который на них опирается, должен падать понятно
+    @property
+    def count(self):
+        raise TypeError('CursorPaginator не считает общее количество '
+                        'записей')
+
+    @property
+    def num_pages(self):
+        raise TypeError('У CursorPaginator нет номеров страниц')
+
+    @property
+    def page_range(self):
+        raise TypeError('У CursorPaginator нет номеров страниц')
+
+    def validate_number(self, number):
+        raise TypeError('CursorPaginator листается курсором: get_page(cursor)')
+
+    def page(self, number):
+        raise TypeError('CursorPaginator листается курсором: get_page(cursor)')
+
+    def encode_cursor(self, item, direction):
+        values = [self._value(item, field) for field in self.fields]
+        raw = json.dumps([direction] + values, default=str)
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Вернуть (direction, values) или None для битого курсора."""
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding)
+            direction, *values = json.loads(raw.decode())
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        if direction not in (NEXT, PREVIOUS) or (
+                len(values) != len(self.fields)):
+            return None
+        model = self.object_list.model
+        try:
+            values = [model._meta.get_field(field).to_python(value)
+                      for field, value in zip(self.fields, values)]
+        except Exception:
+            return None
+        return direction, values
+
+    def get_page(self, cursor):
+        """Вернуть страницу по курсору; битый курсор даёт первую страницу."""
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self._page(self.object_list.order_by(*self.ordering),
+                              direction=None)
+        direction, values = decoded
+        if direction == NEXT:
+            queryset = self.object_list.filter(
+                self._after(self.ordering, values)
+            ).order_by(*self.ordering)
+        else:
+            reverse = tuple(self._reverse(name) for name in self.ordering)
+            queryset = self.object_list.filter(
+                self._after(reverse, values)
+            ).order_by(*reverse)
+        return self._page(queryset, direction)
+
+    def _page(self, queryset, direction):
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == PREVIOUS:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, direction == NEXT
+        page = CursorPage(items, self, has_next, has_previous)
+        if self.hydrate is not None:
+            page.object_list = self.hydrate(items)
+        return page
+
+    @staticmethod
+    def _value(item, field):
+        if isinstance(item, dict):
+            return item[field]
+        return getattr(item, field)
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    @staticmethod
+    def _after(ordering, values):
+        """
+        Условие «строго после values» для лексикографического порядка:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        for index, name in enumerate(ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for prefix, value in zip(ordering[:index], values):
+                step &= Q(**{prefix.lstrip('-'): value})
+            condition |= step
+        return condition
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # крайние строки ключа: object_list может быть заменён hydrate
+        self._edges = (object_list[0], object_list[-1]) if object_list else ()
+
+    is_cursor = True
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self._edges:
+            return None
+        return self.paginator.encode_cursor(self._edges[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self._edges:
+            return None
+        return self.paginator.encode_cursor(self._edges[0], PREVIOUS)
+
+    def start_index(self):
+        raise TypeError('У страницы курсора нет сквозной нумерации')
+
+    def end_index(self):
+        raise TypeError('У страницы курсора нет сквозной нумерации')
+
+    def next_page_number(self):
+        raise TypeError('Следующая страница курсора — next_cursor')
+
+    def previous_page_number(self):
+        raise TypeError('Предыдущая страница курсора — previous_cursor')
+
+    def __repr__(self):
+        return '<Cursor page>'
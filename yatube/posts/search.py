@@ -0,0 +1,131 @@
+"""
+Полнотекстовый поиск по постам и группам на SQLite FTS5.
+
+Индексы posts_post_fts и posts_group_fts хранят собственную копию текста
+(rowid совпадает с id записи) и обновляются сигналами при сохранении и
+удалении. Русский текст приводится к общему виду: «ё» заменяется на «е»,
+регистр сворачивает токенизатор unicode61. В запросе у слов отрезаются
+типичные окончания и ищется префикс основы, поэтому «котами» находит
+и «кот», и «коту». На других СУБД поиск откатывается к icontains.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+POSTS_INDEX = 'posts_post_fts'
+GROUPS_INDEX = 'posts_group_fts'
+TOKENIZER = 'unicode61 remove_diacritics 2'
+
+INDEXES = {
+    POSTS_INDEX: ('text',),
+    GROUPS_INDEX: ('title', 'description'),
+}
+
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ией', 'иях', 'ого', 'его', 'ому', 'ему', 'ыми',
+    'ими', 'ешь', 'ете', 'ишь', 'ите', 'ать', 'ять', 'ить', 'еть', 'ует',
+    'ют', 'ут', 'ат', 'ят', 'ет', 'ит', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие',
+    'ый', 'ий', 'ой', 'ей', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ом', 'ем',
+    'ию', 'ия', 'ью', 'ы', 'и', 'а', 'я', 'о', 'е', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM = 3
+WORD_RE = re.compile(r'\w+')
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def stem(word):
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def match_expression(query):
+    """Запрос пользователя -> выражение MATCH; None, если слов нет."""
+    words = WORD_RE.findall(normalize(query))
+    if not words:
+        return None
+    return ' AND '.join(f'"{stem(word)}"*' for word in words)
+
+
+def index_rows(table, rows):
+    """Переиндексировать строки [(id, колонка, ...)]."""
+    if not is_available() or not rows:
+        return
+    columns = INDEXES[table]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s',
+                           [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, {", ".join(columns)}) '
+            f'VALUES (%s, {", ".join(["%s"] * len(columns))})',
+            [(row[0], *(normalize(value) for value in row[1:]))
+             for row in rows])
+
+
+def unindex(table, ids):
+    if not is_available() or not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s',
+                           [(pk,) for pk in ids])
+
+
+def index_post(post):
+    index_rows(POSTS_INDEX, [(post.pk, post.text)])
+
+
+def index_group(group):
+    index_rows(GROUPS_INDEX, [(group.pk, group.title, group.description)])
+
+
+def reindex_range(table, queryset, fields, start, end):
+    """Переиндексировать записи с id в [start, end) одной транзакцией."""
+    rows = list(queryset.filter(pk__gte=start, pk__lt=end).order_by(
+        'pk').values_list('pk', *fields))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE rowid >= %s AND rowid < %s',
+            [start, end])
+        index_rows(table, rows)
+    return len(rows)
+
+
+def _filter(queryset, table, fallback_fields, query):
+    expression = match_expression(query)
+    if expression is None:
+        return queryset.none()
+    if not is_available():
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+    # индекс присоединяется по rowid, rank берётся из него же: без
+    # подзапроса в IN (...), где некоторые версии SQLite теряют
+    # совпадения по префиксу, и без списка id в параметрах
+    source = queryset.model._meta.db_table
+    return queryset.extra(
+        select={'rank': f'{table}.rank'},
+        tables=[table],
+        where=[f'{table}.rowid = {source}.id', f'{table} MATCH %s'],
+        params=[expression])
+
+
+def search_posts(queryset, query):
+    """Посты, подходящие под запрос, от более релевантных к менее."""
+    found = _filter(queryset, POSTS_INDEX, ('text',), query)
+    if 'rank' not in found.query.extra:
+        return found.order_by('-pub_date')
+    return found.order_by('rank', '-pub_date')
+
+
+def search_groups(queryset, query):
+    return _filter(queryset, GROUPS_INDEX, ('title', 'description'), query)
@@ -0,0 +1,115 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, search, thumbnails, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def author_scopes(*user_ids):
+    usernames = User.objects.filter(pk__in=user_ids).values_list(
+        'username', flat=True)
+    return [cache.author_scope(username) for username in usernames]
+
+
+def post_scopes(post):
+    scopes = [cache.GLOBAL] + author_scopes(post.author_id)
+    slug = getattr(post, '_old_group_slug', None)
+    if slug:
+        scopes.append(cache.group_scope(slug))
+    if post.group_id:
+        slug = Group.objects.filter(pk=post.group_id).values_list(
+            'slug', flat=True).first()
+        if slug:
+            scopes.append(cache.group_scope(slug))
+    return scopes
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_group_slug, instance._old_image = Post.objects.filter(
+            pk=instance.pk).values_list('group__slug', 'image').first() or (
+                None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.increment(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+        timeline.forget_followers(instance.author_id)
+    if instance.image and (
+            instance.image.name != getattr(instance, '_old_image', None)):
+        thumbnails.schedule(instance.image.name)
+    search.index_post(instance)
+    cache.bump(*post_scopes(instance))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    AuthorStats.objects.increment(instance.author_id, posts_count=-1)
+    search.unindex(search.POSTS_INDEX, [instance.pk])
+    timeline.forget_followers(instance.author_id)
+    cache.bump(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).first()
+    if post is not None:
+        cache.bump(*post_scopes(post))
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    search.index_group(instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    search.unindex(search.GROUPS_INDEX, [instance.pk])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    scopes = [cache.GLOBAL, cache.GROUPS, cache.group_scope(instance.slug)]
+    old_slug = getattr(instance, '_old_slug', None)
+    if old_slug:
+        scopes.append(cache.group_scope(old_slug))
+    cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.increment(instance.author_id, followers_count=1)
+        AuthorStats.objects.increment(instance.user_id, following_count=1)
+        timeline.followers_changed(instance.author_id, 1)
+        timeline.backfill(instance)
+        timeline.forget(instance.user_id)
+    cache.bump(*author_scopes(instance.author_id, instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    AuthorStats.objects.increment(instance.author_id, followers_count=-1)
+    AuthorStats.objects.increment(instance.user_id, following_count=-1)
+    timeline.followers_changed(instance.author_id, -1)
+    timeline.trim(instance)
+    timeline.forget(instance.user_id)
+    cache.bump(*author_scopes(instance.author_id, instance.user_id))
@@ -0,0 +1,22 @@
+from django import template
+
+from .. import holes
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    return render_cards(posts)
+
+
+@register.simple_tag
+def post_card(post):
+    return render_cards([post])
+
+
+@register.simple_tag
+def hole(name, *args):
+    """Место для фрагмента зрителя, см. posts.holes."""
+    return holes.marker(name, *args)
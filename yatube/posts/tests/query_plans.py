@@ -0,0 +1,54 @@
+"""
+Проверка планов запросов: каждый SELECT, выполненный внутри блока,
+прогоняется через EXPLAIN QUERY PLAN, и тест падает, если SQLite
+читает таблицу целиком или сортирует во временном B-дереве.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# SCAN без индекса; «SCAN t USING INDEX» — проход по индексу в нужном
+# порядке, он допустим. Проход по подзапросу в FROM таблицей не считается
+FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+TEMP_B_TREE = 'USE TEMP B-TREE'
+
+
+def query_plan(sql, params=None):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_full_scan(step):
+    match = FULL_SCAN_RE.match(step)
+    return match is not None and (
+        match.group(1) in connection.introspection.table_names())
+
+
+def bad_steps(sql, params=None):
+    return [step for step in query_plan(sql, params)
+            if is_full_scan(step) or TEMP_B_TREE in step]
+
+
+@contextmanager
+def assert_indexed_queries(testcase, allowed=()):
+    """
+    Все SELECT внутри блока должны идти по индексам. allowed — шаблоны
+    SQL, которым полный проход разрешён (например, крошечные таблицы).
+    """
+    with CaptureQueriesContext(connection) as captured:
+        yield captured
+    problems = []
+    for query in captured.captured_queries:
+        sql = query['sql']
+        if not sql.startswith('SELECT') or any(
+                re.search(pattern, sql) for pattern in allowed):
+            continue
+        steps = bad_steps(sql)
+        if steps:
+            problems.append(f'{sql}\n    -> {"; ".join(steps)}')
+    if problems:
+        testcase.fail('Запросы без подходящего индекса:\n'
+                      + '\n'.join(problems))
@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='label', slug='test-slug',
+                                         description='labels description')
+        cls.posts = [Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                         group=cls.group if i % 2 else None)
+                     for i in range(5)]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def get(self, url, client=None, **params):
+        response = (client or self.client).get(url, params)
+        return response.status_code, response.json()
+
+    def test_index_is_cursor_paginated(self):
+        status, data = self.get(reverse('api:index'), limit=2)
+        self.assertEqual(status, 200)
+        ids = [post['id'] for post in data['results']]
+        while data['next']:
+            _, data = self.get(reverse('api:index'), limit=2,
+                               cursor=data['next'])
+            ids += [post['id'] for post in data['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get(reverse('api:profile', args=['author']),
+                               fields='id,text')
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertNotIn('posts_comment', queries[-1]['sql'])
+        status, data = self.get(reverse('api:index'), fields='id,secret')
+        self.assertEqual(status, 400)
+
+    def test_group_and_follow_feeds(self):
+        _, data = self.get(reverse('api:group', args=['test-slug']))
+        self.assertEqual({post['group'] for post in data['results']},
+                         {'test-slug'})
+        status, _ = self.get(reverse('api:follow_index'))
+        self.assertEqual(status, 401)
+        client = Client()
+        client.force_login(self.reader)
+        _, data = self.get(reverse('api:follow_index'), client)
+        self.assertEqual(len(data['results']), 5)
+        _, data = self.get(reverse('api:follow_index'), client, limit=2,
+                           fields='text')
+        texts = [post['text'] for post in data['results']]
+        while data['next']:
+            _, data = self.get(reverse('api:follow_index'), client, limit=2,
+                               fields='text', cursor=data['next'])
+            texts += [post['text'] for post in data['results']]
+        self.assertEqual(texts, [f'Пост {i}' for i in reversed(range(5))])
+
+    def test_post_with_comments(self):
+        post = self.posts[0]
+        _, data = self.get(reverse('api:post', args=[post.pk]))
+        self.assertEqual(data['comment_count'], 1)
+        self.assertEqual(data['comments']['results'][0]['author'], 'reader')
+        status, _ = self.get(reverse('api:post', args=[10 ** 6]))
+        self.assertEqual(status, 404)
+
+    def test_batch_keeps_requested_order(self):
+        ids = [self.posts[3].pk, 10 ** 6, self.posts[1].pk]
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get(reverse('api:posts_batch'),
+                               ids=','.join(map(str, ids)))
+        self.assertEqual([post['id'] for post in data['results']],
+                         [ids[0], ids[2]])
+        self.assertEqual(data['missing'], [10 ** 6])
+        self.assertEqual(len(queries), 1)
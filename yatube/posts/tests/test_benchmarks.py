@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from .. import benchmarks
+from ..models import AuthorStats, Follow, Group, Post, User
+
+
+class BenchmarksTest(TestCase):
+    def test_seed_and_run_cover_every_view(self):
+        dataset = benchmarks.seed(users=10, groups=2, posts=40, follows=3,
+                                  comments=2)
+        self.assertEqual(dataset['posts'], 40)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(
+            AuthorStats.objects.get(user__username='bench_user_0')
+            .followers_count,
+            Follow.objects.filter(author__username='bench_user_0').count())
+        results = benchmarks.run(repeat=2)
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+            'add_comment', 'new_post'})
+        for result in results.values():
+            self.assertEqual(result['requests'], 2)
+            self.assertGreater(result['queries_min'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_same_seed_gives_same_dataset(self):
+        def dataset():
+            benchmarks.seed(users=5, groups=2, posts=10, follows=2,
+                            comments=1, random_seed=7)
+            texts = list(Post.objects.order_by('pk').values_list(
+                'text', 'author__username', 'group__title'))
+            User.objects.all().delete()
+            Group.objects.all().delete()
+            return texts
+
+        self.assertEqual(dataset(), dataset())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmarks.percentile(values, 50), 50)
+        self.assertEqual(benchmarks.percentile(values, 95), 95)
+        self.assertEqual(benchmarks.percentile([7], 99), 7)
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from yatube.cache_backends import CULL_CHECK_INTERVAL, SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_are_shared_between_instances(self):
+        self.cache.set('page', {'html': '<p>Пост</p>'})
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get('page'), {'html': '<p>Пост</p>'})
+
+    def test_get_many_set_many_and_add(self):
+        self.cache.set_many({'a': 1, 'b': 'два', 'c': None})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c', 'd']),
+                         {'a': 1, 'b': 'два', 'c': None})
+        self.assertFalse(self.cache.add('a', 5))
+        self.assertTrue(self.cache.add('d', 5))
+        self.cache.set('e', 1, timeout=-1)
+        self.assertIsNone(self.cache.get('e'))
+        self.assertTrue(self.cache.add('e', 2))
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertEqual(SQLiteCache(self.location, {}).incr('counter', 5), 7)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('counter', 'текст')
+        self.assertEqual(self.cache.get('counter'), 'текст')
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_ENTRIES': 10}})
+        cache.set('hot', 'значение')
+        for i in range(CULL_CHECK_INTERVAL - 1):
+            cache._db.execute("UPDATE cache SET accessed = 0 "
+                              "WHERE key != ':1:hot'")
+            cache.set(f'key{i}', i)
+        self.assertEqual(cache.get('hot'), 'значение')
+        count = cache._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        self.assertLessEqual(count, 10)
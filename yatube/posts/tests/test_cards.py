@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cards import card_key, render_cards
+from ..models import Comment, Group, Post, User
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='label',
+            slug='test-slug',
+            description='labels description for testing cards'
+        )
+        cls.post = Post.objects.create(text='Тестовый текст',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_post(self):
+        return Post.objects.for_feed().get(pk=self.post.pk)
+
+    def test_card_is_rendered_once(self):
+        render_cards([self.get_post()])
+        with mock.patch('posts.cards.render_to_string') as render:
+            html = render_cards([self.get_post()])
+        render.assert_not_called()
+        self.assertIn('Тестовый текст', html)
+
+    def test_content_change_changes_key(self):
+        key = card_key(self.get_post())
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        self.assertNotEqual(card_key(self.get_post()), key)
+        Group.objects.filter(pk=self.group.pk).update(title='Новое имя')
+        post = self.get_post()
+        self.assertIn('Новое имя', render_cards([post]))
+
+    def test_edit_button_is_viewer_specific(self):
+        edit_url = reverse('post_edit', kwargs={
+            'username': self.author.username, 'post_id': self.post.pk})
+        client = Client()
+        client.force_login(self.author)
+        self.assertContains(client.get(reverse('index')), edit_url)
+        client.force_login(self.reader)
+        self.assertNotContains(client.get(reverse('index')), edit_url)
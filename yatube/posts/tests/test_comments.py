@@ -0,0 +1,49 @@
+import re
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class PaginatedCommentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Тестовый текст',
+                                       author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(5))
+        cls.kwargs = {'username': cls.author.username,
+                      'post_id': cls.post.pk}
+
+    def comment_texts(self, response):
+        return re.findall(r'Комментарий \d', response.content.decode())
+
+    def next_fragment(self, response):
+        match = re.search(r'data-fragment="([^"]+)"',
+                          response.content.decode())
+        return match and match.group(1).replace('&amp;', '&')
+
+    def test_comments_are_loaded_in_batches(self):
+        response = self.client.get(reverse('post', kwargs=self.kwargs))
+        self.assertEqual(self.comment_texts(response),
+                         ['Комментарий 0', 'Комментарий 1'])
+        texts = []
+        url = self.next_fragment(response)
+        while url:
+            response = self.client.get(url)
+            self.assertNotContains(response, '<html')
+            texts += self.comment_texts(response)
+            url = self.next_fragment(response)
+        self.assertEqual(texts, [f'Комментарий {i}' for i in range(2, 5)])
+
+    def test_add_comment_form_shows_first_batch(self):
+        self.client.force_login(self.author)
+        response = self.client.post(reverse('add_comment',
+                                            kwargs=self.kwargs), {'text': ''})
+        self.assertEqual(len(response.context['comments']), 2)
+        self.assertTrue(response.context['comments'].has_next())
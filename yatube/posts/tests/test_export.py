@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class ExportViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='label', slug='test-slug',
+                                         description='labels description')
+        cls.first = Post.objects.create(text='Первый, с запятой',
+                                        author=cls.author, group=cls.group)
+        cls.second = Post.objects.create(text='Второй', author=cls.author)
+
+    def get_content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_profile_export_jsonl(self):
+        response = self.client.get(reverse(
+            'profile_export', args=[self.author.username, 'jsonl']))
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="author.jsonl"')
+        rows = [json.loads(line)
+                for line in self.get_content(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [self.second.pk, self.first.pk])
+        self.assertEqual(rows[1]['group'], 'test-slug')
+        self.assertEqual(rows[1]['author'], 'author')
+
+    def test_group_export_csv(self):
+        response = self.client.get(reverse(
+            'group_export', args=[self.group.slug, 'csv']))
+        content = self.get_content(response)
+        self.assertTrue(content.startswith('id,text,pub_date,'))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['text'], 'Первый, с запятой')
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse(
+            'group_export', args=[self.group.slug, 'xml']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='label', slug='test-slug',
+                                         description='labels description')
+        cls.post = Post.objects.create(text='Пост в группе',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_posts(self):
+        urls = [
+            reverse('feed_rss'),
+            reverse('feed_atom'),
+            reverse('group_rss', args=[self.group.slug]),
+            reverse('group_atom', args=[self.group.slug]),
+            reverse('profile_rss', args=[self.author.username]),
+            reverse('profile_atom', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Пост в группе')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_unknown_group_is_404(self):
+        response = self.client.get(reverse('group_rss', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_modified(self):
+        url = reverse('group_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+    def test_edit_changes_etag(self):
+        url = reverse('profile_rss', args=[self.author.username])
+        etag = self.client.get(url)['ETag']
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный текст')
+
+    def test_delete_moves_last_modified_forward(self):
+        url = reverse('feed_rss')
+        later = Post.objects.create(text='Новый пост', author=self.author)
+        modified = self.client.get(url)['Last-Modified']
+        with mock.patch('posts.cache.time') as time:
+            # 2100 год: удаление точно позже первого ответа
+            time.time.return_value = 4102444800
+            later.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('2100', response['Last-Modified'])
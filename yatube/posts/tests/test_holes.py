@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..holes import fill, marker
+from ..models import Follow, Post, User
+
+
+class HolesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader-1')
+        cls.post = Post.objects.create(text='Общий пост', author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user, url):
+        self.client.force_login(user)
+        return self.client.get(url)
+
+    def test_feed_is_shared_between_users(self):
+        response = self.get(self.author, reverse('index'))
+        self.assertContains(response, 'Пользователь: author.')
+        self.assertContains(response, 'Редактировать')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(self.reader, reverse('index'))
+        self.assertFalse(any('posts_post' in query['sql']
+                             for query in queries.captured_queries))
+        self.assertContains(response, 'Пользователь: reader-1.')
+        self.assertNotContains(response, 'Редактировать')
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_follow_button_depends_on_viewer(self):
+        url = reverse('profile', args=['author'])
+        self.assertContains(self.get(self.reader, url), 'Отписаться')
+        self.assertContains(self.get(self.author, url), 'Подписаться')
+
+    def test_marker_args_survive_encoding(self):
+        self.client.force_login(self.reader)
+        request = self.client.get(reverse('index')).wsgi_request
+        html = fill(str(marker('edit', self.post.pk, 'reader-1')), request)
+        self.assertIn(reverse('post_edit', args=['reader-1', self.post.pk]),
+                      html)
+
+    def test_post_text_cannot_forge_marker(self):
+        Post.objects.create(text='<!--hole:nav-->', author=self.author)
+        response = self.get(self.reader, reverse('index'))
+        self.assertContains(response, '&lt;!--hole:nav--&gt;')
+        self.assertContains(response, 'Пользователь: reader-1.', count=1)
@@ -0,0 +1,60 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# поворот на 90° по часовой стрелке при показе
+EXIF_ROTATE_90 = 6
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0,
+                   POST_IMAGE_MAX_SIZE=(400, 400))
+class ImageNormalizationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def upload(self, image, name, **save_options):
+        content = io.BytesIO()
+        image.save(content, **save_options)
+        self.client.post(reverse('new_post'), {
+            'text': 'С картинкой',
+            'image': SimpleUploadedFile(name, content.getvalue()),
+        })
+        return Post.objects.get(text='С картинкой')
+
+    def test_photo_is_rotated_resized_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = EXIF_ROTATE_90
+        post = self.upload(Image.new('RGB', (1200, 600), 'red'), 'photo.jpg',
+                           format='JPEG', exif=exif.tobytes())
+        self.assertTrue(post.image.name.startswith('posts/photo'))
+        self.assertEqual((post.image_width, post.image_height), (200, 400))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (200, 400))
+            self.assertEqual(stored.format, settings.POST_IMAGE_FORMAT)
+            self.assertNotIn(0x0112, stored.getexif())
+
+    def test_small_transparent_image_keeps_size(self):
+        post = self.upload(Image.new('RGBA', (50, 30), (0, 0, 0, 0)),
+                           'icon.png', format='PNG')
+        self.assertEqual((post.image_width, post.image_height), (50, 30))
+        with Image.open(post.image.path) as stored:
+            self.assertIn(stored.mode, ('RGBA', 'LA'))
@@ -0,0 +1,116 @@
+import datetime as dt
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import search, timeline
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+class ImportContentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='label', slug='test-slug',
+                                         description='labels description')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def call(self, *args):
+        call_command('import_content', *args, '--batch-size', '2',
+                     stdout=StringIO(), stderr=StringIO())
+
+    def test_import_posts_from_jsonl(self):
+        rows = [
+            {'author': 'author', 'group': 'test-slug', 'text': 'Архивный кот',
+             'pub_date': '2015-03-01T10:00:00'},
+            {'author': 'author', 'text': 'Второй пост'},
+            {'author': 'author', 'text': 'Третий пост'},
+            {'author': 'nobody', 'text': 'Пропустить'},
+        ]
+        path = self.write('posts.jsonl',
+                          '\n'.join(json.dumps(row) for row in rows))
+        timeline.CachedFollowFeed(self.reader).count()
+        self.call(path)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(timeline.CachedFollowFeed(self.reader).count(), 3)
+        archived = Post.objects.get(text='Архивный кот')
+        self.assertEqual(archived.group, self.group)
+        self.assertEqual(archived.pub_date, timezone.make_aware(
+            dt.datetime(2015, 3, 1, 10), timezone.utc))
+        self.assertEqual(AuthorStats.objects.get(user=self.author)
+                         .posts_count, 3)
+        self.assertEqual(self.reader.timeline.count(), 3)
+        self.assertEqual(list(search.search_posts(Post.objects.all(),
+                                                  'кот')), [archived])
+        # auto_now_add вернулся на место
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertGreater(post.pub_date, archived.pub_date)
+
+    def test_malformed_rows_are_skipped(self):
+        path = self.write('posts.jsonl', '\n'.join([
+            '{"author": "author", "text": "Целый пост"}',
+            '{"author": "author", "text": "Оборванная',
+            '["не", "объект"]',
+            json.dumps({'author': 'author'}),
+            json.dumps({'author': 'author', 'text': 'Дата',
+                        'pub_date': 'вчера'}),
+        ]))
+        stderr = StringIO()
+        call_command('import_content', path, stdout=StringIO(),
+                     stderr=stderr)
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Целый пост'])
+        self.assertEqual(stderr.getvalue().count('Пропущено'), 4)
+        comments = self.write('comments.csv',
+                              'post,author,text\nабв,reader,Привет\n')
+        self.call(comments, '--kind', 'comments')
+        self.assertFalse(Comment.objects.exists())
+
+    def test_derived_data_is_updated_after_failed_import(self):
+        path = self.write('posts.jsonl',
+                          '{"author": "author", "text": "Пост"}')
+        command = 'posts.management.commands.import_content.Command'
+        with mock.patch(f'{command}.after_import') as after_import:
+            with mock.patch.object(Post.objects, 'bulk_create',
+                                   side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    self.call(path)
+        after_import.assert_called_once()
+
+    def test_import_comments_and_follows_from_csv(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        comments = self.write(
+            'comments.csv',
+            'post,author,text,created\n'
+            f'{post.pk},reader,Привет,2020-01-01T00:00:00\n'
+            f'{post.pk + 100},reader,Нет поста,\n')
+        self.call(comments, '--kind', 'comments')
+        self.assertEqual(list(Comment.objects.values_list('text', flat=True)),
+                         ['Привет'])
+        follows = self.write('follows.csv',
+                             'user,author\nauthor,reader\nreader,author\n')
+        self.call(follows, '--kind', 'follows')
+        self.assertEqual(Follow.objects.count(), 2)
+        self.assertEqual(AuthorStats.objects.get(user=self.reader)
+                         .followers_count, 1)
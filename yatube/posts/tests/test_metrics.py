@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from yatube.metrics import Histogram, registry
+
+from ..models import Post, User
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Тестовый текст', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('index'))
+        self.assertRegex(response['Server-Timing'],
+                         r'total;dur=[\d.]+, db;dur=[\d.]+;'
+                         r'desc="\d+ queries", tpl;dur=[\d.]+')
+
+    def test_template_time_is_measured_by_backend(self):
+        self.client.get(reverse('index'))
+        histogram = registry._histograms['index']['template_duration']
+        self.assertGreater(histogram.sum, 0)
+
+    def test_metrics_are_aggregated_per_view(self):
+        self.client.get(reverse('index'))
+        self.client.get(reverse('index'))
+        client = Client()
+        client.force_login(self.staff)
+        text = client.get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_request_duration_seconds_count{view="index"} 2',
+                      text)
+        self.assertIn(
+            'yatube_db_queries{view="index",quantile="0.95"}', text)
+        self.assertIn('# TYPE yatube_template_duration_seconds summary',
+                      text)
+        self.assertNotIn('view="metrics"', text)
+        self.assertIn('# TYPE yatube_thumbnail_kvstore_hits_total counter',
+                      text)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_are_protected(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = Client().get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_histogram_window(self):
+        histogram = Histogram(window=10)
+        for value in range(100):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.quantiles()[0.5], 95)
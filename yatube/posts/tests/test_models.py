@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import AuthorStats, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -28,3 +31,49 @@ class GroupModelTest(TestCase):
     def test_title(self):
         object_name = GroupModelTest.group.title
         self.assertEqual(object_name, str(GroupModelTest.group))
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def assertStats(self, user, posts, followers, following):
+        stats = AuthorStats.objects.get(user=user)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count,
+             stats.following_count),
+            (posts, followers, following))
+
+    def test_counters_follow_writes(self):
+        Post.objects.create(text='Первый', author=self.author)
+        self.assertStats(self.author, 1, 0, 0)
+        post = Post.objects.create(text='Второй', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertStats(self.author, 2, 1, 0)
+        self.assertStats(self.reader, 0, 0, 1)
+        post.delete()
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertStats(self.author, 1, 0, 0)
+        self.assertStats(self.reader, 0, 0, 0)
+
+    def test_for_user_does_not_write(self):
+        Post.objects.create(text='Первый', author=self.author)
+        AuthorStats.objects.filter(user=self.author).delete()
+        with self.assertNumQueries(1):
+            stats = AuthorStats.objects.for_user(self.author)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertFalse(AuthorStats.objects.filter(user=self.author).exists())
+
+    def test_reconcile_repairs_drift(self):
+        Post.objects.create(text='Первый', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.filter(user=self.author).update(posts_count=42)
+        AuthorStats.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('reconcile_author_stats', batch_size=1, stdout=out)
+        self.assertStats(self.author, 1, 1, 0)
+        self.assertStats(self.reader, 0, 0, 1)
+        self.assertIn('Создано записей: 1, исправлено: 1', out.getvalue())
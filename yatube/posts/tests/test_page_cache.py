@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import cache as page_cache
+from ..models import Post, User
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Первая версия', author=cls.author)
+        cls.url = reverse('post', args=['author', cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        for key in page_cache.stats:
+            page_cache.stats[key] = 0
+
+    def lock(self, url):
+        key = page_cache._page_key(RequestFactory().get(url))
+        cache.add(key + '.lock', 1)
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Первая версия')
+        self.assertEqual(page_cache.stats, {'hits': 1, 'misses': 1,
+                                            'stale': 0})
+
+    @override_settings(PAGE_CACHE_SOFT_TTL=0)
+    def test_stale_page_is_served_while_another_request_recomputes(self):
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Вторая версия')
+        self.lock(self.url)
+        self.assertContains(self.client.get(self.url), 'Первая версия')
+        self.assertEqual(page_cache.stats['stale'], 1)
+
+    @override_settings(PAGE_CACHE_SOFT_TTL=0)
+    def test_expired_page_is_recomputed_by_one_request(self):
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Вторая версия')
+        self.assertContains(self.client.get(self.url), 'Вторая версия')
+        self.assertEqual(page_cache.stats['misses'], 2)
+
+    def test_waiter_stops_once_lock_is_released_without_page(self):
+        self.lock(self.url)
+        key = page_cache._page_key(RequestFactory().get(self.url))
+        with mock.patch('posts.cache.time.sleep') as sleep:
+            # держатель ответил, но ответ не попал в кэш
+            sleep.side_effect = lambda delay: cache.delete(key + '.lock')
+            self.assertContains(self.client.get(self.url), 'Первая версия')
+        sleep.assert_called_once()
+        self.assertIsNone(cache.get(key + '.lock'))
+
+    def test_generation_bump_makes_page_stale(self):
+        self.client.get(reverse('index'))
+        Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertContains(self.client.get(reverse('index')), 'Свежий пост')
+
+    def test_logged_in_users_bypass_cache(self):
+        self.client.force_login(self.author)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(page_cache.stats, {'hits': 0, 'misses': 0,
+                                            'stale': 0})
+
+
+class GenerationBumpTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_inside_transaction_repeats_after_commit(self):
+        with mock.patch.object(transaction, 'on_commit') as on_commit:
+            with transaction.atomic():
+                page_cache.bump(page_cache.GLOBAL)
+        before = page_cache.get_generations([page_cache.GLOBAL])
+        # читатель между сдвигом и COMMIT не должен пережить фиксацию
+        on_commit.call_args[0][0]()
+        self.assertEqual(page_cache.get_generations([page_cache.GLOBAL]),
+                         [before[0] + 1])
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..pagination import CursorPaginator
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='label',
+            slug='test-slug',
+            description='labels description for testing paginator'
+        )
+        for i in range(13):
+            Post.objects.create(
+                text=f'{i} тестовый текст',
+                author=cls.user,
+                group=cls.group,
+            )
+        cls.client = Client()
+
+    def test_pages_follow_each_other(self):
+        posts = list(Post.objects.order_by('-pub_date', '-id'))
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        first = paginator.get_page(None)
+        self.assertEqual(list(first), posts[:5])
+        self.assertFalse(first.has_previous())
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(list(second), posts[5:10])
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual(list(third), posts[10:])
+        self.assertFalse(third.has_next())
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(list(back), posts[5:10])
+        self.assertTrue(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        for cursor in ('garbage', 'bm9wZQ', ''):
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(len(page), 5)
+                self.assertFalse(page.has_previous())
+
+    def test_page_numbers_are_rejected_explicitly(self):
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        page = paginator.get_page(None)
+        for name, call in (('count', lambda: paginator.count),
+                           ('num_pages', lambda: paginator.num_pages),
+                           ('page', lambda: paginator.page(2)),
+                           ('start_index', page.start_index),
+                           ('end_index', page.end_index)):
+            with self.subTest(name=name):
+                with self.assertRaises(TypeError):
+                    call()
+
+    def test_cursor_query_param_switches_views(self):
+        cache.clear()
+        pages = [
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+        ]
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url + '?cursor=')
+                page = response.context['page']
+                self.assertEqual(len(page.object_list), 10)
+                response = self.client.get(
+                    url + f'?cursor={page.next_cursor}')
+                self.assertEqual(
+                    len(response.context['page'].object_list), 3)
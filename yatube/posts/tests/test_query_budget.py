@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from yatube.query_budget import (QueryBudgetExceeded, normalize,
+                                 track_queries, untracked)
+
+from ..models import Comment, Post, User
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        for number in range(6):
+            post = Post.objects.create(text=f'Пост {number}',
+                                       author=cls.author)
+            Comment.objects.create(post=post, author=cls.author, text='Ок')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_normalize_drops_values(self):
+        self.assertEqual(
+            normalize('SELECT * FROM t WHERE id IN (%s, %s,%s)\n LIMIT 21'),
+            'SELECT * FROM t WHERE id IN (...) LIMIT ?')
+
+    def test_repeated_query_in_template_is_reported(self):
+        template = engines['django'].from_string(
+            '{% for post in posts %}\n{{ post.comments.count }}{% endfor %}')
+        with track_queries() as tracker:
+            template.render({'posts': list(Post.objects.all())})
+        [(shape, count, where)] = tracker.repeated()
+        self.assertEqual(count, 6)
+        self.assertIn('posts_comment', shape)
+        self.assertEqual(where, '<unknown source>:2')
+
+    def test_untracked_queries_are_not_counted(self):
+        with track_queries() as tracker:
+            Post.objects.count()
+            with untracked():
+                Post.objects.count()
+        self.assertEqual(tracker.total, 1)
+
+    @override_settings(QUERY_BUDGETS={'index': 1}, QUERY_BUDGET_RAISE=True)
+    def test_budget_raises_in_tests(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'index:'):
+            self.client.get(reverse('index'))
+
+    @override_settings(QUERY_BUDGETS={'index': 1}, QUERY_BUDGET_RAISE=False)
+    def test_budget_is_logged_in_production(self):
+        with self.assertLogs('yatube.query_budget', 'WARNING') as logs:
+            response = self.client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('при бюджете 1', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_DEFAULT=0)
+    def test_views_outside_checked_modules_are_skipped(self):
+        response = self.client.get(reverse('api:index'))
+        self.assertEqual(response.status_code, 200)
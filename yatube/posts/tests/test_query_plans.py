@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from .query_plans import assert_indexed_queries, bad_steps
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='label', slug='test-slug',
+                                         description='labels description')
+        cls.post = Post.objects.create(text='Тестовый текст',
+                                       author=cls.author, group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_feeds_use_indexes(self):
+        post_kwargs = {'username': self.author.username,
+                       'post_id': self.post.pk}
+        urls = [
+            reverse('index'),
+            reverse('index') + '?cursor=',
+            reverse('group', args=[self.group.slug]),
+            reverse('profile', args=[self.author.username]),
+            reverse('post', kwargs=post_kwargs),
+            reverse('add_comment', kwargs=post_kwargs),
+            reverse('follow_index'),
+            reverse('follow_index') + '?cursor=',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with assert_indexed_queries(self):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_follow_cursor_pages_use_index(self):
+        Post.objects.create(text='Новый пост', author=self.author)
+        with self.settings(PAGINATOR_PAGES=1):
+            response = self.client.get(reverse('follow_index') + '?cursor=')
+            cursor = response.context['page'].next_cursor
+            with assert_indexed_queries(self):
+                response = self.client.get(
+                    reverse('follow_index') + f'?cursor={cursor}')
+        self.assertEqual(list(response.context['page']), [self.post])
+
+    def test_detects_full_scan_and_sort(self):
+        query = Post.objects.filter(
+            text__startswith='Тест').order_by('text').query
+        self.assertEqual(len(bad_steps(*query.sql_with_params())), 2)
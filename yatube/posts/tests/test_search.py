@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.cats = Post.objects.create(
+            text='Ёжик и коты гуляли по лесу', author=cls.user)
+        cls.dogs = Post.objects.create(
+            text='Собака лаяла на кота, кот убежал. Кот!', author=cls.user)
+        cls.group = Group.objects.create(
+            title='Любители котов', slug='cats', description='Про кошек')
+        cls.client = Client()
+
+    def found(self, query):
+        return list(search.search_posts(Post.objects.all(), query))
+
+    def test_russian_word_forms_match(self):
+        self.assertEqual(set(self.found('котами')), {self.cats, self.dogs})
+        self.assertEqual(self.found('ежики'), [self.cats])
+        self.assertEqual(self.found('собаки кот'), [self.dogs])
+
+    def test_more_relevant_posts_come_first(self):
+        self.assertEqual(self.found('кот')[0], self.dogs)
+
+    def test_index_follows_edits_and_deletes(self):
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = 'Теперь про птиц'
+        cats.save()
+        self.assertEqual(self.found('птицы'), [cats])
+        self.assertEqual(self.found('ежик'), [])
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_search_view_and_groups(self):
+        response = self.client.get(reverse('search'), {'q': 'ежик'})
+        self.assertEqual(list(response.context['page']), [self.cats])
+        self.assertEqual(
+            list(search.search_groups(Group.objects.all(), 'коты')),
+            [self.group])
+
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.POSTS_INDEX}')
+        self.assertEqual(self.found('собака'), [])
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.found('собака'), [self.dogs])
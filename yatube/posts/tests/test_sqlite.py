@@ -0,0 +1,138 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from yatube import sqlite
+from yatube.sqlite import serialized_write
+
+from .. import images
+from ..models import Post, User
+
+
+@override_settings(SQLITE_PRODUCTION=True, SQLITE_WRITE_BACKOFF=0)
+class SQLiteProductionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.request = RequestFactory().post('/')
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        # у соединения теста уже открыта транзакция, берём новое
+        other = connection.copy()
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+    def test_locked_write_is_retried(self):
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'ok'])
+        self.assertEqual(serialized_write(view)(self.request), 'ok')
+        self.assertEqual(view.call_count, 2)
+
+    @override_settings(SQLITE_WRITE_RETRIES=2)
+    def test_gives_up_after_retries(self):
+        view = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            serialized_write(view)(self.request)
+        self.assertEqual(view.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        view = mock.Mock(side_effect=OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            serialized_write(view)(self.request)
+        self.assertEqual(view.call_count, 1)
+
+    def test_safe_methods_bypass_write_queue(self):
+        def view(request):
+            return sqlite._write_lock.locked()
+
+        get = RequestFactory().get('/')
+        self.assertFalse(serialized_write(view)(get))
+        self.assertTrue(serialized_write(on_get=True)(view)(get))
+        self.assertTrue(serialized_write(view)(self.request))
+
+    def test_backoff_sleeps_without_lock(self):
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'ok'])
+        with mock.patch('yatube.sqlite.time.sleep') as sleep:
+            sleep.side_effect = lambda delay: self.assertFalse(
+                sqlite._write_lock.locked())
+            self.assertEqual(serialized_write(view)(self.request), 'ok')
+        sleep.assert_called_once()
+
+    def upload(self):
+        """Отправить пост с картинкой; вернуть файлы в MEDIA_ROOT."""
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        content = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(content, 'JPEG')
+        self.client.force_login(self.user)
+        with self.settings(MEDIA_ROOT=media_root):
+            try:
+                self.client.post(reverse('new_post'), {
+                    'text': 'С картинкой',
+                    'image': SimpleUploadedFile('photo.jpg',
+                                                content.getvalue()),
+                })
+            except OperationalError:
+                pass
+        return [name for _, _, names in os.walk(media_root)
+                for name in names]
+
+    def test_image_is_stored_outside_write_queue(self):
+        locked = []
+        original = images.process
+
+        def process(post):
+            locked.append(sqlite._write_lock.locked())
+            original(post)
+
+        with mock.patch('posts.models.images.process', process):
+            files = self.upload()
+        self.assertEqual(locked, [False])
+        self.assertEqual(len(files), 1)
+        self.assertTrue(Post.objects.filter(text='С картинкой').exists())
+
+    def test_retry_does_not_store_image_again(self):
+        save_base = Post.save_base
+        calls = []
+
+        def locked_once(post, *args, **kwargs):
+            calls.append(post)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return save_base(post, *args, **kwargs)
+
+        with mock.patch.object(Post, 'save_base', locked_once):
+            files = self.upload()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(Post.objects.filter(text='С картинкой').exists())
+
+    def test_failed_write_removes_stored_image(self):
+        error = OperationalError('disk I/O error')
+        with mock.patch.object(Post, 'save_base', side_effect=error):
+            self.assertEqual(self.upload(), [])
+        self.assertFalse(Post.objects.filter(text='С картинкой').exists())
+
+    def test_new_post_goes_through_write_queue(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('new_post'),
+                                    {'text': 'Через очередь'})
+        self.assertRedirects(response, reverse('index'))
+        self.assertTrue(Post.objects.filter(text='Через очередь').exists())
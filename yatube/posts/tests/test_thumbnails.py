@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import cache as page_cache
+from .. import kvstore, thumbnails
+from ..cards import render_cards
+from ..models import Post, User
+
+
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='author'),
+            text='Тестовый текст',
+            image='posts/small.gif',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_post(self):
+        return Post.objects.for_feed().get(pk=self.post.pk)
+
+    @mock.patch('posts.thumbnails.get_thumbnail')
+    def test_placeholder_until_thumbnail_is_ready(self, get_thumbnail):
+        get_thumbnail.return_value.url = '/media/cache/small.jpg'
+        html = render_cards([self.get_post()])
+        self.assertIn('Изображение обрабатывается', html)
+        self.assertNotIn('<img', html)
+        thumbnails.generate(self.post.image.name)
+        html = render_cards([self.get_post()])
+        self.assertIn('src="/media/cache/small.jpg"', html)
+        self.assertNotIn('width=', html)
+
+    @mock.patch('posts.thumbnails.get_thumbnail')
+    def test_card_image_has_thumbnail_size(self, get_thumbnail):
+        get_thumbnail.return_value.url = '/media/cache/small.jpg'
+        Post.objects.filter(pk=self.post.pk).update(image_width=480,
+                                                    image_height=480)
+        thumbnails.generate(self.post.image.name)
+        html = render_cards([self.get_post()])
+        self.assertIn('width="960" height="339"', html)
+
+    def test_thumbnail_size_follows_sorl(self):
+        self.assertEqual(thumbnails.thumbnail_size(
+            3000, 1000, '960x339', {'crop': 'center'}), (960, 339))
+        self.assertEqual(thumbnails.thumbnail_size(
+            3000, 1000, '960x960', {}), (960, 320))
+        self.assertEqual(thumbnails.thumbnail_size(
+            300, 100, '960x960', {'upscale': False}), (300, 100))
+        self.assertIsNone(thumbnails.thumbnail_size(None, None, '960', {}))
+
+    @mock.patch('posts.thumbnails.get_thumbnail')
+    def test_ready_thumbnail_refreshes_cached_pages(self, get_thumbnail):
+        get_thumbnail.return_value.url = '/media/cache/small.jpg'
+        scopes = [page_cache.GLOBAL, page_cache.author_scope('author')]
+        before = page_cache.get_generations(scopes)
+        thumbnails.generate(self.post.image.name)
+        self.assertEqual(page_cache.get_generations(scopes),
+                         [generation + 1 for generation in before])
+
+    @mock.patch('posts.thumbnails.get_thumbnail')
+    def test_missing_source_is_not_marked_ready(self, get_thumbnail):
+        get_thumbnail.return_value.exists.return_value = False
+        thumbnails.generate(self.post.image.name)
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            self.assertEqual(
+                thumbnails.get_urls([self.post.image.name],
+                                    thumbnails.card_geometry()),
+                {})
+        schedule.assert_not_called()
+
+
+class LRUKVStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = kvstore.KVStore()
+        self.store.clear()
+
+    def test_values_and_misses_are_served_from_memory(self):
+        self.store._set_raw('key', 'value')
+        self.assertIsNone(self.store._get_raw('absent'))
+        hits = dict(kvstore.stats)
+        with mock.patch.object(kvstore.CachedDBStore, '_get_raw') as shared:
+            self.assertEqual(self.store._get_raw('key'), 'value')
+            self.assertIsNone(self.store._get_raw('absent'))
+        shared.assert_not_called()
+        self.assertEqual(kvstore.stats['hits'], hits['hits'] + 1)
+        self.assertEqual(kvstore.stats['negative_hits'],
+                         hits['negative_hits'] + 1)
+
+    def test_lru_is_bounded(self):
+        with self.settings(THUMBNAIL_KVSTORE_LRU_SIZE=2):
+            for key in ('a', 'b', 'c'):
+                self.store._set_raw(key, key)
+        self.assertEqual(list(kvstore.KVStore._entries), ['b', 'c'])
+        self.store._delete_raw('b')
+        self.assertEqual(list(kvstore.KVStore._entries), ['c'])
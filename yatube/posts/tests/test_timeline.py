@@ -0,0 +1,137 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from ..models import AuthorStats, Follow, Post, TimelineEntry, User
+from ..timeline import CachedFollowFeed, _feed_key, cursor_page, follow_feed
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(text='Старый пост',
+                                           author=cls.author)
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.reader).values_list('post_id', flat=True)),
+            {self.old_post.id, new_post.id})
+        self.assertEqual(list(follow_feed(self.reader)),
+                         [new_post, self.old_post])
+
+    def test_unfollow_trims_timeline(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        self.assertEqual(list(follow_feed(self.reader)), [])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_popular_author_is_read_on_demand(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(follow_feed(self.reader)),
+                         [new_post, self.old_post])
+
+    def test_deleting_author_does_not_recreate_stats(self):
+        author = User.objects.create_user(username='leaving')
+        Post.objects.create(text='Пост', author=author)
+        author_id = author.pk
+        author.delete()
+        self.assertFalse(AuthorStats.objects.filter(
+            user_id=author_id).exists())
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+    def test_crossing_threshold_moves_author_between_modes(self):
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        Follow.objects.filter(user=other).delete()
+        # посты, вышедшие, пока автор читался напрямую, не пропали
+        self.assertEqual(list(follow_feed(self.reader)),
+                         [new_post, self.old_post])
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=self.reader).count(), 2)
+
+    def test_cursor_pages_follow_timeline_order(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        first = cursor_page(self.reader, None, 1)
+        self.assertEqual(list(first), [new_post])
+        second = cursor_page(self.reader, first.next_cursor, 1)
+        self.assertEqual(list(second), [self.old_post])
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(cursor_page(self.reader,
+                                          second.previous_cursor, 1)),
+                         [new_post])
+
+
+class CachedFollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(text='Старый пост',
+                                           author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, number=1, per_page=10):
+        paginator = Paginator(CachedFollowFeed(self.reader), per_page)
+        page = paginator.page(number)
+        return paginator.count, list(page)
+
+    def test_repeat_view_is_one_query(self):
+        self.page()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.page(), (1, [self.old_post]))
+
+    def test_new_post_of_followed_author_invalidates(self):
+        self.page()
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.page(), (2, [new_post, self.old_post]))
+
+    def test_unfollow_invalidates(self):
+        self.page()
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.page(), (0, []))
+
+    def test_new_post_forgets_feed_again_after_commit(self):
+        with mock.patch.object(transaction, 'on_commit') as on_commit:
+            Post.objects.create(text='Новый пост', author=self.author)
+        # читатель до COMMIT закэшировал бы ленту без нового поста
+        self.page()
+        for call in on_commit.call_args_list:
+            call[0][0]()
+        self.assertIsNone(cache.get(_feed_key(self.reader.pk)))
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0,
+                       FOLLOW_FEED_PULLED_CACHE_TIMEOUT=7)
+    def test_feed_with_popular_author_expires_instead_of_reset(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.page()
+        self.assertEqual(cache_set.call_args[0][2], 7)
+        with mock.patch.object(cache, 'delete_many') as delete_many:
+            Post.objects.create(text='Новый пост', author=self.author)
+        delete_many.assert_not_called()
+
+    @override_settings(FOLLOW_FEED_CACHED_POSTS=1)
+    def test_pages_beyond_cached_ids_read_database(self):
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.page(1, per_page=1), (2, [new_post]))
+        self.assertEqual(self.page(2, per_page=1), (2, [self.old_post]))
@@ -6,10 +6,12 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -55,6 +57,10 @@ class PostViewsTests(TestCase):
         shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
         super().tearDownClass()
 
+    def setUp(self):
+        # ленты групп и профилей тоже кэшируются
+        cache.clear()
+
     def check_post_context(self, context):
         if context.get('post'):
             post = context['post']
@@ -76,15 +82,30 @@ class PostViewsTests(TestCase):
         response = self.authorized_client.get(reverse('index'))
         cache_content = response.context['page'][0].text
         self.assertEqual(cache_content, post.text)
-        post.delete()
         response1 = self.authorized_client.get(reverse('index'))
         self.assertEqual(response1.context, None)
-        cache.clear()
+        self.assertEqual(response1.content, response.content)
+        post.delete()
         response2 = self.authorized_client.get(reverse('index'))
         cache_content2 = response2.context['page'][0].text
-        self.assertNotEqual(cache_content2, None)
         self.assertEqual(cache_content2, PostViewsTests.post.text)
 
+    def test_cache_is_invalidated_by_scope(self):
+        cache.clear()
+        group_url = reverse('group',
+                            kwargs={'slug': PostViewsTests.group.slug})
+        profile_url = reverse(
+            'profile', kwargs={'username': PostViewsTests.user.username})
+        self.guest_client.get(group_url)
+        self.guest_client.get(profile_url)
+        Post.objects.create(author=PostViewsTests.author,
+                            group=PostViewsTests.group, text='Новый')
+        self.assertIsNotNone(self.guest_client.get(group_url).context)
+        self.assertIsNone(self.guest_client.get(profile_url).context)
+        Comment.objects.create(post=PostViewsTests.post,
+                               author=PostViewsTests.user, text='Ок')
+        self.assertIsNotNone(self.guest_client.get(group_url).context)
+
     def test_follow_index(self):
         cache.clear()
         self.authorized_client1.get(reverse('profile_follow', kwargs={
@@ -187,6 +208,9 @@ class PaginatorViewTest(TestCase):
             )
         cls.client = Client()
 
+    def setUp(self):
+        cache.clear()
+
     def test_paginator_first_page_contains_ten_records(self):
         cache.clear()
         response = self.client.get(reverse('index'))
@@ -241,3 +265,59 @@ class TestFollow(TestCase):
     def setUp(self):
         self.authorized_user = Client()
         self.authorized_user.force_login(self.follow_user)
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='label',
+            slug='test-slug',
+            description='labels description for testing feeds'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f'{i} тестовый текст',
+                author=self.user,
+                group=self.group,
+            )
+            Comment.objects.create(post=post, author=self.reader, text='Ок')
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return len(context)
+
+    def test_feed_queries_do_not_grow_with_page_size(self):
+        pages = [
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+            reverse('follow_index'),
+        ]
+        self.create_posts(1)
+        for url in pages:
+            self.count_queries(url)
+        single = {url: self.count_queries(url) for url in pages}
+        self.create_posts(9)
+        for url in pages:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
+
+    def test_feed_shows_comment_count(self):
+        self.create_posts(1)
+        cache.clear()
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.context['page'][0].comment_count, 1)
+        self.assertContains(response, 'Комментариев: 1')
@@ -0,0 +1,45 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import AuthorStats, Group, Post, User
+
+
+class WarmCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='label', slug='test-slug',
+                                         description='labels description')
+        Post.objects.create(text='Пост с картинкой', author=cls.author,
+                            group=cls.group, image='posts/cat.jpg')
+        Post.objects.create(text='Пост без картинки', author=cls.author)
+        AuthorStats.objects.get_or_create(user=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def warm(self):
+        stdout = StringIO()
+        with mock.patch('posts.thumbnails.generate') as generate:
+            call_command('warm_cache', '--concurrency', '1',
+                         stdout=stdout, stderr=StringIO())
+        return generate, stdout.getvalue()
+
+    def test_generates_thumbnails_for_feed_images(self):
+        generate, _ = self.warm()
+        generate.assert_called_once_with('posts/cat.jpg')
+
+    @override_settings(WARM_CACHE_BASE_URL='https://localhost')
+    def test_pages_served_from_cache_after_warming(self):
+        _, output = self.warm()
+        self.assertIn('Страницы: 3', output)
+        for url in ('/', '/group/test-slug/', '/author/'):
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_HOST='localhost',
+                                           secure=True)
+                self.assertEqual(response.status_code, 200)
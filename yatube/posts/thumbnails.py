@@ -0,0 +1,175 @@
+"""
+Фоновая подготовка миниатюр картинок постов.
+
+После загрузки картинки все размеры из POST_THUMBNAILS генерируются в
+локальном пуле потоков. Готовый адрес миниатюры кладётся в кэш, и
+карточка берёт его оттуда; пока миниатюры нет, карточка показывает
+заглушку, а не делает ресайз во время отрисовки страницы. Когда все
+размеры готовы, поколения страниц с этим постом сдвигаются, чтобы
+закэшированные страницы с заглушкой не жили весь свой срок. Если
+исходника нет, это запоминается на THUMBNAIL_MISSING_TIMEOUT, чтобы
+каждая отрисовка не ставила картинку в очередь заново.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.parsers import parse_geometry
+
+from yatube.query_budget import untracked
+
+from . import cache as page_cache
+from . import kvstore
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+stats = {'ready': 0, 'scheduled': 0, 'missing_sources': 0}
+
+
+def card_geometry():
+    return settings.POST_THUMBNAILS[0][0]
+
+
+def thumbnail_size(width, height, geometry, options):
+    """
+    Размер миниатюры картинки width×height — тот же расчёт, что в sorl:
+    масштаб, затем обрезка. None, если размер картинки не записан.
+    """
+    if not width or not height:
+        return None
+    x, y = parse_geometry(geometry, width / height)
+    crop = options.get('crop')
+    factor = (max if crop else min)(x / width, y / height)
+    if factor < 1 or options.get('upscale', sorl_settings.THUMBNAIL_UPSCALE):
+        width, height = round(width * factor), round(height * factor)
+    if crop:
+        width, height = min(width, x), min(height, y)
+    return width, height
+
+
+def card_size(post):
+    """Размер миниатюры карточки: по нему <img> получает width и
+    height, и место под картинку занято до её загрузки."""
+    return thumbnail_size(post.image_width, post.image_height,
+                          *settings.POST_THUMBNAILS[0])
+
+
+def _ready_key(name, geometry):
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f'thumbnail:{geometry}:{digest}'
+
+
+def _missing_key(name):
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f'thumbnail:missing:{digest}'
+
+
+def get_urls(names, geometry):
+    """
+    Адреса готовых миниатюр {name: url}; неготовые ставятся в очередь,
+    кроме картинок, исходника которых недавно не нашлось.
+    """
+    names = [name for name in names if name]
+    keys = {_ready_key(name, geometry): name for name in names}
+    missing_keys = {_missing_key(name): name for name in names}
+    found = cache.get_many([*keys, *missing_keys])
+    urls = {keys[key]: url for key, url in found.items() if key in keys}
+    missing = {missing_keys[key] for key in found if key in missing_keys}
+    stats['ready'] += len(urls)
+    stats['missing_sources'] += len(missing)
+    for name in names:
+        if name not in urls and name not in missing:
+            stats['scheduled'] += 1
+            schedule(name)
+    return urls
+
+
+def generate(name):
+    """Сгенерировать все размеры миниатюр для картинки name."""
+    try:
+        for geometry, options in settings.POST_THUMBNAILS:
+            thumbnail = get_thumbnail(name, geometry, **options)
+            if not thumbnail.exists():
+                logger.warning('Нет исходной картинки %s', name)
+                cache.set(_missing_key(name), True,
+                          settings.THUMBNAIL_MISSING_TIMEOUT)
+                return
+            cache.set(_ready_key(name, geometry), thumbnail.url, None)
+        refresh_pages(name)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры для %s', name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def refresh_pages(name):
+    """Сдвинуть поколения страниц, на которых пост с картинкой name
+    показывался заглушкой."""
+    # signals импортирует этот модуль, поэтому импорт здесь
+    from .signals import post_scopes
+    for post in Post.objects.filter(image=name).only('author_id',
+                                                     'group_id'):
+        page_cache.bump(*post_scopes(post))
+
+
+def _run(name):
+    try:
+        generate(name)
+    finally:
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails')
+        return _executor
+
+
+def _submit(name):
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    if settings.THUMBNAIL_WORKERS:
+        _get_executor().submit(_run, name)
+    else:
+        # работа пула, выполненная на месте: не в счёт бюджета запросов
+        with untracked():
+            generate(name)
+
+
+def collect_metrics():
+    """Счётчики миниатюр и LRU хранилища sorl для yatube.metrics."""
+    counters = [
+        ('yatube_thumbnail_ready_total', 'Миниатюры, найденные готовыми',
+         stats['ready']),
+        ('yatube_thumbnail_scheduled_total',
+         'Миниатюры, поставленные в очередь', stats['scheduled']),
+        ('yatube_thumbnail_missing_sources_total',
+         'Пропуски картинок без исходника', stats['missing_sources']),
+    ]
+    for key, value in kvstore.stats.items():
+        counters.append((f'yatube_thumbnail_kvstore_{key}_total',
+                         f'LRU хранилища sorl: {key}', value))
+    return counters
+
+
+def schedule(name):
+    """Поставить картинку в очередь после фиксации транзакции."""
+    transaction.on_commit(lambda: _submit(name))
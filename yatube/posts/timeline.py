@@ -0,0 +1,222 @@
+"""
+Ленты подписок, материализованные при записи (fan-out-on-write).
+
+Пост автора раскладывается в TimelineEntry всех его подписчиков, поэтому
+follow_index читает готовую ленту по индексу. Для авторов, у которых
+подписчиков больше TIMELINE_FANOUT_MAX_FOLLOWERS, раскладка не делается:
+их посты подмешиваются при чтении (fan-out-on-read). Когда автор
+пересекает порог, его посты убираются из лент подписчиков или
+раскладываются по ним заново (followers_changed).
+
+Первые FOLLOW_FEED_CACHED_POSTS id ленты каждого пользователя и её длина
+хранятся в кэше (CachedFollowFeed): повторный просмотр — это чтение ключа
+и один запрос id__in. Ключ удаляется при подписке и отписке пользователя
+и при новом или удалённом посте любого из его раскладываемых авторов —
+сразу и ещё раз после коммита. Обходить подписчиков популярного автора
+на каждый пост дорого, поэтому ленты с такими авторами просто живут в
+кэше недолго (FOLLOW_FEED_PULLED_CACHE_TIMEOUT).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .pagination import CursorPaginator
+
+BATCH_SIZE = 500
+
+
+def is_fanned_out(author):
+    count = _followers_count(author.pk) or 0
+    return count <= settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if not is_fanned_out(post.author):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def _backfill(author_id, user_ids):
+    posts = list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('pk', 'pub_date')[
+            :settings.TIMELINE_BACKFILL])
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for user_id in user_ids for pk, pub_date in posts),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def backfill(follow):
+    """Добавить в ленту подписчика последние посты нового автора."""
+    if is_fanned_out(follow.author):
+        _backfill(follow.author_id, [follow.user_id])
+
+
+def _followers_count(author_id):
+    return AuthorStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first()
+
+
+def followers_changed(author_id, delta):
+    """
+    Подписчиков автора стало больше или меньше на delta. Если он перешёл
+    порог TIMELINE_FANOUT_MAX_FOLLOWERS, в лентах подписчиков не должно
+    остаться дыр: популярный автор из них убирается (его посты читаются
+    напрямую), а вернувшийся под порог раскладывается по ним заново.
+    """
+    count = _followers_count(author_id)
+    if count is None:
+        return
+    threshold = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True)
+    if delta > 0 and count - delta <= threshold < count:
+        TimelineEntry.objects.filter(post__author_id=author_id).delete()
+    elif delta < 0 and count <= threshold < count - delta:
+        _backfill(author_id, followers.iterator())
+    else:
+        return
+    forget(*followers)
+
+
+def trim(follow):
+    """Убрать из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id).delete()
+
+
+def pulled_authors(user):
+    """id популярных авторов пользователя: их посты читаются напрямую."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=(
+            settings.TIMELINE_FANOUT_MAX_FOLLOWERS),
+    ).values_list('author_id', flat=True))
+
+
+def follow_feed(user, pulled=None, posts=None):
+    """Посты для follow_index: материализованная лента плюс посты
+    популярных авторов, читаемые напрямую. posts — исходная выборка
+    постов (по умолчанию for_feed)."""
+    if pulled is None:
+        pulled = pulled_authors(user)
+    if posts is None:
+        posts = Post.objects.for_feed()
+    if not pulled:
+        # сортировка по копии pub_date в ленте идёт по индексу
+        # (user, -pub_date, -post) без отдельной сортировки
+        return posts.filter(timeline_entries__user=user).order_by(
+            '-timeline_entries__pub_date')
+    timeline = TimelineEntry.objects.filter(user=user).values('post_id')
+    return posts.filter(Q(pk__in=timeline) | Q(author_id__in=pulled))
+
+
+def _feed_key(user_id):
+    return f'follow_feed:{user_id}'
+
+
+def forget(*user_ids):
+    """Сбросить кэш лент. Внутри транзакции — ещё и после коммита, иначе
+    параллельный follow_index положил бы в кэш ленту без этой записи."""
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        cache.delete_many([_feed_key(user_id)
+                           for user_id in user_ids[start:start + BATCH_SIZE]])
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: forget(*user_ids))
+
+
+def forget_followers(author_id):
+    """Сбросить кэш лент подписчиков автора. Их не больше
+    TIMELINE_FANOUT_MAX_FOLLOWERS: ленты с популярным автором истекают
+    сами."""
+    count = _followers_count(author_id)
+    if count is not None and count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        return
+    forget(*Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True))
+
+
+def cursor_page(user, cursor, per_page, posts=None):
+    """
+    Страница ленты подписок в курсорном режиме. Без популярных авторов
+    курсор идёт по самой ленте в порядке индекса (user, -pub_date, -post),
+    а посты страницы выбираются из posts одним запросом id__in. posts
+    может быть и values() с полем id.
+    """
+    if posts is None:
+        posts = Post.objects.for_feed()
+    pulled = pulled_authors(user)
+    if pulled:
+        return CursorPaginator(follow_feed(user, pulled, posts),
+                               per_page).get_page(cursor)
+
+    def hydrate(entries):
+        page_ids = [entry['post_id'] for entry in entries]
+        found = {CursorPaginator._value(row, 'id'): row
+                 for row in posts.filter(pk__in=page_ids)}
+        # пост могли удалить между выборкой ленты и постов
+        return [found[pk] for pk in page_ids if pk in found]
+
+    ordering = ('-pub_date', '-post_id')
+    entries = TimelineEntry.objects.filter(user=user).order_by(
+        *ordering).values('pub_date', 'post_id')
+    return CursorPaginator(entries, per_page, ordering,
+                           hydrate=hydrate).get_page(cursor)
+
+
+class CachedFollowFeed:
+    """
+    Лента подписок для Paginator: длина и первые страницы берутся из
+    кэша, посты по закэшированным id выбираются одним запросом. Дальние
+    страницы читаются из follow_feed как обычно.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def pulled(self):
+        return pulled_authors(self.user)
+
+    @cached_property
+    def queryset(self):
+        return follow_feed(self.user, self.pulled)
+
+    @cached_property
+    def cached(self):
+        key = _feed_key(self.user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            limit = settings.FOLLOW_FEED_CACHED_POSTS
+            ids = list(self.queryset.values_list('pk', flat=True)[:limit])
+            count = len(ids) if len(ids) < limit else self.queryset.count()
+            cached = (count, ids)
+            cache.set(key, cached, settings.FOLLOW_FEED_PULLED_CACHE_TIMEOUT
+                      if self.pulled else settings.FOLLOW_FEED_CACHE_TIMEOUT)
+        return cached
+
+    def count(self):
+        return self.cached[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        # Paginator берёт только срезы
+        count, ids = self.cached
+        if index.stop > len(ids) and len(ids) < count:
+            return list(self.queryset[index])
+        page_ids = ids[index]
+        posts = Post.objects.for_feed().in_bulk(page_ids)
+        # пост могли удалить, пока список id лежал в кэше
+        return [posts[pk] for pk in page_ids if pk in posts]
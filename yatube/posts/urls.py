@@ -1,18 +1,38 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path('group/<slug:slug>/export.<str:fmt>',
+         views.group_export, name='group_export'),
     path('new/', views.new_post, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search_posts, name='search'),
+    path('feeds/rss/', feeds.conditional(feeds.LatestPostsFeed()),
+         name='feed_rss'),
+    path('feeds/atom/', feeds.conditional(feeds.LatestPostsAtomFeed()),
+         name='feed_atom'),
+    path('feeds/group/<slug:slug>/rss/',
+         feeds.conditional(feeds.GroupPostsFeed()), name='group_rss'),
+    path('feeds/group/<slug:slug>/atom/',
+         feeds.conditional(feeds.GroupPostsAtomFeed()), name='group_atom'),
+    path('feeds/author/<str:username>/rss/',
+         feeds.conditional(feeds.AuthorPostsFeed()), name='profile_rss'),
+    path('feeds/author/<str:username>/atom/',
+         feeds.conditional(feeds.AuthorPostsAtomFeed()),
+         name='profile_atom'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/export.<str:fmt>',
+         views.profile_export, name='profile_export'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit, name='post_edit'),
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments, name='post_comments'),
 
     path('<str:username>/follow/',
          views.profile_follow, name='profile_follow'),
@@ -2,54 +2,102 @@ from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from yatube.sqlite import serialized, serialized_write
+
+from . import export, search, timeline
+from .cache import (GLOBAL, GROUPS, author_scope, cache_page_by_generation,
+                    group_scope)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import AuthorStats, Follow, Group, Post, User
+from .pagination import CursorPaginator
 
 
 def make_pagination(request, object_list, per_page):
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.PAGINATOR_MODE == 'cursor':
+        return CursorPaginator(object_list, per_page).get_page(cursor)
     paginator = Paginator(object_list, per_page)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-@cache_page(20)
+def save_post(post):
+    """
+    Картинка обрабатывается и сохраняется до очереди записей, в очереди —
+    только запись в базу. Если запись не удалась, новый файл удаляется.
+    """
+    stored = post.store_image()
+    try:
+        serialized(post.save)
+    except Exception:
+        if stored:
+            post.image.storage.delete(post.image.name)
+        raise
+
+
+@cache_page_by_generation(lambda request: [GLOBAL])
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     page = make_pagination(request, post_list, settings.PAGINATOR_PAGES)
     return render(request, 'index.html', {'page': page})
 
 
+@cache_page_by_generation(lambda request, slug: [group_scope(slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     page = make_pagination(request, post_list, settings.PAGINATOR_PAGES)
     return render(request, 'group.html', {'page': page, 'group': group})
 
 
+@cache_page_by_generation(
+    lambda request, username: [author_scope(username), GROUPS])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    user = request.user
-    post_list = Post.objects.filter(author=author)
+    post_list = Post.objects.for_feed().filter(author=author)
     page = make_pagination(request, post_list, settings.PAGINATOR_PAGES)
-    following = user.is_authenticated and (
-        Follow.objects.filter(user=user, author=author).exists())
     context = {
         'author': author,
+        'stats': AuthorStats.objects.for_user(author),
         'page': page,
-        'following': following,
     }
     return render(request, 'profile.html', context)
 
 
+def group_export(request, slug, fmt):
+    group = get_object_or_404(Group, slug=slug)
+    return export.stream(group.posts.all(), fmt, f'group-{slug}')
+
+
+def profile_export(request, username, fmt):
+    author = get_object_or_404(User, username=username)
+    return export.stream(author.posts.all(), fmt, username)
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    post_list = search.search_posts(Post.objects.for_feed(), query)
+    paginator = Paginator(post_list, settings.PAGINATOR_PAGES)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {'page': page, 'query': query})
+
+
+def comments_page(post, cursor=None):
+    """Очередная пачка комментариев поста по курсору (по возрастанию id)."""
+    paginator = CursorPaginator(post.comments.select_related('author'),
+                                settings.COMMENTS_PER_PAGE, ordering=('id',))
+    return paginator.get_page(cursor)
+
+
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post.objects.select_related('author'),
+    post = get_object_or_404(Post.objects.for_feed(),
                              id=post_id, author__username=username)
     form = CommentForm(instance=None)
-    comments = post.comments.select_related('author').all()
+    comments = comments_page(post, request.GET.get('comments'))
     return render(request, 'post.html',
                   {'author': post.author,
+                   'stats': AuthorStats.objects.for_user(post.author),
                    'post': post,
                    'comments': comments,
                    'form': form})
@@ -63,7 +111,7 @@ def new_post(request):
                       {'form': form, 'mode': 'create'})
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    save_post(post)
     return redirect('index')
 
 
@@ -76,7 +124,7 @@ def post_edit(request, username, post_id):
     form = PostForm(request.POST or None,
                     files=request.FILES or None, instance=post)
     if form.is_valid():
-        form.save()
+        save_post(form.save(commit=False))
         return redirect('post', username=username, post_id=post_id)
     return render(request,
                   'new_post.html',
@@ -84,9 +132,9 @@ def post_edit(request, username, post_id):
 
 
 @login_required
+@serialized_write
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
-    comments = post.comments.all()
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -98,18 +146,33 @@ def add_comment(request, username, post_id):
         )
     return render(request, 'comments.html', {'author': post.author,
                                              'post': post,
-                                             'comments': comments,
+                                             'comments': comments_page(post),
                                              'form': form})
 
 
+def post_comments(request, username, post_id):
+    """HTML-фрагмент со следующей пачкой комментариев для «Показать ещё»."""
+    post = get_object_or_404(Post, author__username=username, id=post_id)
+    return render(request, 'includes/comment_list.html',
+                  {'post': post,
+                   'comments': comments_page(post, request.GET.get('cursor'))})
+
+
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page = make_pagination(request, post_list, settings.PAGINATOR_PAGES)
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.PAGINATOR_MODE == 'cursor':
+        page = timeline.cursor_page(request.user, cursor,
+                                    settings.PAGINATOR_PAGES)
+    else:
+        page = make_pagination(request,
+                               timeline.CachedFollowFeed(request.user),
+                               settings.PAGINATOR_PAGES)
     return render(request, 'follow.html', {'page': page})
 
 
 @login_required
+@serialized_write(on_get=True)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -119,6 +182,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@serialized_write(on_get=True)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
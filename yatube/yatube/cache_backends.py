@@ -0,0 +1,208 @@
+"""
+Кэш в файле SQLite, общий для всех процессов сервера.
+
+В отличие от LocMemCache записи видны всем WSGI-воркерам, поэтому
+инвалидация по поколениям (posts.cache) доходит до каждого процесса.
+Внешние сервисы не нужны: хватает файла, указанного в LOCATION.
+
+Размер ограничен MAX_ENTRIES: при переполнении вытесняются давно не
+читавшиеся записи (LRU по колонке accessed). Целые числа хранятся как
+INTEGER, поэтому incr — это UPDATE и чтение результата в одной
+транзакции BEGIN IMMEDIATE, атомарные между процессами. RETURNING и
+ON CONFLICT не используются: их нет в SQLite старее 3.35 и 3.24.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+
+# accessed обновляется не чаще раза в столько секунд, чтобы чтение
+# не превращалось в запись на каждом обращении
+ACCESS_RESOLUTION = 1.0
+# как часто (в записях на процесс) проверять переполнение
+CULL_CHECK_INTERVAL = 50
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self._path, timeout=30,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _encode(self, value):
+        if type(value) is int:
+            return value
+        return sqlite3.Binary(pickle.dumps(value, self.pickle_protocol))
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _expires(self, timeout):
+        # BaseCache возвращает абсолютное время истечения или None
+        return self.get_backend_timeout(timeout)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {self._key(key, version): key for key in keys}
+        if not key_map:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(key_map))
+        rows = self._db.execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            [*key_map, now]).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if accessed < now - ACCESS_RESOLUTION]
+        if stale:
+            self._db.execute(
+                f'UPDATE cache SET accessed = ? '
+                f'WHERE key IN ({", ".join("?" * len(stale))})',
+                [now, *stale])
+        return {key_map[key]: self._decode(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self._expires(timeout)
+        rows = [(self._key(key, version), self._encode(value), expires, now)
+                for key, value in data.items()]
+        db = self._db
+        with _transaction(db):
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)', rows)
+        self._maybe_cull(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        db = self._db
+        with _transaction(db):
+            db.execute('DELETE FROM cache WHERE key = ? AND expires <= ?',
+                       (key, now))
+            cursor = db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                (key, self._encode(value), self._expires(timeout), now))
+        self._maybe_cull(1)
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), self._key(key, version), time.time()))
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        with _transaction(db):
+            cursor = db.execute(
+                "UPDATE cache SET value = value + ? WHERE key = ? "
+                "AND typeof(value) = 'integer' "
+                "AND (expires IS NULL OR expires > ?)",
+                (delta, key, time.time()))
+            if cursor.rowcount != 1:
+                raise ValueError("Key '%s' not found" % key)
+            return db.execute('SELECT value FROM cache WHERE key = ?',
+                              (key,)).fetchone()[0]
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            placeholders = ', '.join('?' * len(keys))
+            self._db.execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', keys)
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())).fetchone() is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединение переиспользуется потоком между запросами
+        pass
+
+    def _maybe_cull(self, written):
+        self._writes += written
+        if self._writes < CULL_CHECK_INTERVAL:
+            return
+        self._writes = 0
+        db = self._db
+        with _transaction(db):
+            db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            if count <= self._max_entries:
+                return
+            excess = count - self._max_entries
+            victims = max(excess, count // self._cull_frequency)
+            db.execute(
+                'DELETE FROM cache WHERE key IN '
+                '(SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (victims,))
+
+
+class _transaction:
+    """BEGIN IMMEDIATE ... COMMIT: блокировка на запись берётся сразу."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
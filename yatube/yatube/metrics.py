@@ -0,0 +1,215 @@
+"""
+Метрики запросов для продакшена.
+
+MetricsMiddleware на каждый запрос замеряет общее время, число и время
+запросов к базе, время рендеринга шаблонов (их засекает бэкенд
+TimedDjangoTemplates из настройки TEMPLATES) и размер ответа. Значения
+копятся по представлениям в скользящих окнах последних METRICS_WINDOW
+замеров, а в ответ добавляется заголовок Server-Timing.
+
+metrics_view отдаёт перцентили в текстовом формате Prometheus. Метрики
+хранятся в памяти процесса: каждый воркер отдаёт свои, Prometheus
+собирает их по отдельности. Счётчики других модулей подключаются
+настройкой METRICS_COLLECTORS: функция возвращает [(имя, описание,
+значение)].
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+METRICS = {
+    'duration': ('yatube_request_duration_seconds',
+                 'Время обработки запроса'),
+    'db_queries': ('yatube_db_queries', 'Запросов к базе на запрос'),
+    'db_duration': ('yatube_db_duration_seconds',
+                    'Время запросов к базе на запрос'),
+    'template_duration': ('yatube_template_duration_seconds',
+                          'Время рендеринга шаблонов на запрос'),
+    'response_size': ('yatube_response_size_bytes', 'Размер ответа'),
+}
+
+
+class Histogram:
+    """Скользящее окно замеров плюс накопительные сумма и счётчик."""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        return {q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+                for q in QUANTILES}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(dict)
+
+    def observe(self, view, values):
+        window = getattr(settings, 'METRICS_WINDOW', 1000)
+        with self._lock:
+            histograms = self._histograms[view]
+            for metric, value in values.items():
+                if metric not in histograms:
+                    histograms[metric] = Histogram(window)
+                histograms[metric].observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        with self._lock:
+            for metric, (name, help_text) in METRICS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} summary')
+                for view, histograms in sorted(self._histograms.items()):
+                    histogram = histograms.get(metric)
+                    if histogram is None:
+                        continue
+                    label = f'view="{escape_label(view)}"'
+                    for q, value in histogram.quantiles().items():
+                        lines.append(
+                            f'{name}{{{label},quantile="{q}"}} {value}')
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+        for path in getattr(settings, 'METRICS_COLLECTORS', ()):
+            for name, help_text, value in import_string(path)():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def escape_label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n')
+
+
+class _Recorder(threading.local):
+    """Счётчики текущего запроса в потоке воркера."""
+    active = False
+    queries = 0
+    db_duration = 0.0
+    template_duration = 0.0
+    template_depth = 0
+
+
+_recorder = _Recorder()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        # вложенные render_to_string (карточки постов внутри ленты) уже
+        # входят во время внешнего шаблона
+        if not _recorder.active or _recorder.template_depth:
+            return super().render(context, request)
+        _recorder.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            _recorder.template_duration += time.perf_counter() - started
+            _recorder.template_depth -= 1
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates, шаблоны которого засекают рендеринг."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def _count_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        _recorder.queries += 1
+        _recorder.db_duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _recorder.active = True
+        _recorder.queries = 0
+        _recorder.db_duration = 0.0
+        _recorder.template_duration = 0.0
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_count_query))
+                response = self.get_response(request)
+        finally:
+            _recorder.active = False
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        if view == 'metrics':
+            return response
+        values = {
+            'duration': duration,
+            'db_queries': _recorder.queries,
+            'db_duration': _recorder.db_duration,
+            'template_duration': _recorder.template_duration,
+        }
+        if not response.streaming:
+            values['response_size'] = len(response.content)
+        registry.observe(view, values)
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={_recorder.db_duration * 1000:.1f};'
+            f'desc="{_recorder.queries} queries"',
+            f'tpl;dur={_recorder.template_duration * 1000:.1f}',
+        ))
+        return response
+
+
+def is_allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and constant_time_compare(header, f'Bearer {token}'):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def metrics_view(request):
+    # для посторонних адреса как будто нет
+    if not is_allowed(request):
+        raise Http404
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4')
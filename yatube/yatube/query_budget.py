@@ -0,0 +1,162 @@
+"""
+Контроль запросов к базе: поиск N+1 и бюджеты по представлениям.
+
+track_queries() собирает SQL внутри блока и группирует его по форме:
+значения параметров, числа и списки IN (...) отбрасываются. Форма,
+выполненная NPLUSONE_THRESHOLD раз и больше, считается N+1; для неё
+запоминается место вызова — строка шаблона или файл проекта.
+
+QueryBudgetMiddleware проверяет так каждый запрос к представлениям из
+QUERY_BUDGET_MODULES: число запросов не больше QUERY_BUDGETS[имя] (или
+QUERY_BUDGET_DEFAULT) и никаких N+1. Нарушение пишется в лог, а при
+QUERY_BUDGET_RAISE (его включают тестовый раннер и conftest.py для
+pytest) — QueryBudgetExceeded. Запросы внутри untracked() не считаются:
+так фоновая работа, выполненная на месте, не попадает в бюджет
+представления.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+from django.test.runner import DiscoverRunner
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_SPACES = re.compile(r'\s+')
+_THIS_FILE = os.path.abspath(__file__)
+_untracked = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def normalize(sql):
+    sql = _IN_LIST.sub('(...)', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def origin(frame):
+    """Ближайший узел шаблона на стеке, иначе ближайший файл проекта."""
+    project = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if (frame.f_code.co_name == 'render_annotated'
+                and isinstance(node, Node) and node.token is not None):
+            name = node.origin.template_name or node.origin.name
+            return f'{name}:{node.token.lineno}'
+        path = os.path.abspath(frame.f_code.co_filename)
+        if project is None and path.startswith(settings.BASE_DIR) and (
+                path != _THIS_FILE):
+            project = (f'{os.path.relpath(path, settings.BASE_DIR)}:'
+                       f'{frame.f_lineno}')
+        frame = frame.f_back
+    return project or 'unknown'
+
+
+class QueryTracker:
+    def __init__(self):
+        self.total = 0
+        self.shapes = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_untracked, 'active', False):
+            return execute(sql, params, many, context)
+        self.total += 1
+        shape = normalize(sql)
+        self.shapes[shape] += 1
+        # обход стека дорогой: только для повторившейся формы
+        if (self.shapes[shape] == settings.NPLUSONE_THRESHOLD
+                and shape not in self.origins):
+            self.origins[shape] = origin(sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """[(форма, сколько раз, откуда)] для подозрительных на N+1."""
+        return [(shape, count, self.origins.get(shape, 'unknown'))
+                for shape, count in self.shapes.most_common()
+                if count >= settings.NPLUSONE_THRESHOLD]
+
+
+@contextmanager
+def track_queries():
+    tracker = QueryTracker()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(tracker))
+        yield tracker
+
+
+@contextmanager
+def untracked():
+    saved = getattr(_untracked, 'active', False)
+    _untracked.active = True
+    try:
+        yield
+    finally:
+        _untracked.active = saved
+
+
+def get_budget(view_name):
+    return settings.QUERY_BUDGETS.get(view_name,
+                                      settings.QUERY_BUDGET_DEFAULT)
+
+
+def check(view_name, tracker):
+    problems = []
+    budget = get_budget(view_name)
+    if tracker.total > budget:
+        problems.append(f'{tracker.total} запросов при бюджете {budget}')
+    for shape, count, where in tracker.repeated():
+        problems.append(f'N+1: {count}× {shape} ({where})')
+    if not problems:
+        return
+    message = f'{view_name}: ' + '; '.join(problems)
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_queries() as tracker:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match and match.func.__module__ in settings.QUERY_BUDGET_MODULES:
+            check(match.view_name, tracker)
+        return response
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Тесты падают на превышении бюджета, а не пишут предупреждение.
+    Миниатюры в тестах готовятся синхронно: фоновый поток пережил бы
+    override_settings теста и писал бы в настоящий MEDIA_ROOT.
+    """
+    test_settings = {'QUERY_BUDGET_RAISE': True, 'THUMBNAIL_WORKERS': 0}
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._saved_settings = {name: getattr(settings, name)
+                                for name in self.test_settings}
+        for name, value in self.test_settings.items():
+            setattr(settings, name, value)
+
+    def teardown_test_environment(self, **kwargs):
+        for name, value in self._saved_settings.items():
+            setattr(settings, name, value)
+        super().teardown_test_environment(**kwargs)
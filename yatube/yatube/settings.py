@@ -48,26 +48,35 @@ INSTALLED_APPS = [
     'posts',
     'about',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.query_budget.QueryBudgetMiddleware',
+    'posts.cache.AnonymousPageCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.holes.HoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Панель отладки нужна только при разработке
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга для yatube.metrics
+        'BACKEND': 'yatube.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -95,6 +104,21 @@ DATABASES = {
     }
 }
 
+# Продакшен-режим SQLite (yatube.sqlite): прагмы на каждом соединении и
+# очередь записей с повтором, если база занята другим процессом
+SQLITE_PRODUCTION = os.getenv('SQLITE_PRODUCTION') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # отрицательное значение — в КиБ
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+SQLITE_WRITE_RETRIES = 5
+SQLITE_WRITE_BACKOFF = 0.05
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -154,8 +178,102 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Общий для всех воркеров кэш в файле SQLite с LRU-вытеснением
+if os.getenv('CACHE_LOCATION'):
+    CACHES['default'] = {
+        'BACKEND': 'yatube.cache_backends.SQLiteCache',
+        'LOCATION': os.getenv('CACHE_LOCATION'),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+
+# Страницы лент инвалидируются по поколениям (posts.cache), поэтому
+# могут жить долго
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+# Целые страницы для анонимов (posts.cache.AnonymousPageCacheMiddleware):
+# свежая страница отдаётся PAGE_CACHE_SOFT_TTL, потом, пока её пересчитывает
+# один запрос, остальные получают старую — но не дольше PAGE_CACHE_HARD_TTL
+PAGE_CACHE_MODULES = ['posts.views', 'about.views']
+PAGE_CACHE_SOFT_TTL = 20
+PAGE_CACHE_HARD_TTL = 60 * 10
+# блокировка пересчёта и сколько ждать её, если старой страницы нет
+PAGE_CACHE_LOCK_TTL = 30
+PAGE_CACHE_LOCK_WAIT = 2
+# Ключи страниц зависят от схемы и хоста: warm_cache запрашивает страницы
+# с адреса, под которым сайт открывают посетители
+WARM_CACHE_BASE_URL = os.getenv(
+    'WARM_CACHE_BASE_URL', f'https://{ALLOWED_HOSTS[0]}')
+
+# Карточка поста кэшируется по хэшу содержимого (posts.cards)
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Готовые фрагменты зрителя для дырок в страницах (posts.holes)
+HOLE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Загруженные картинки постов уменьшаются, поворачиваются по EXIF и
+# перекодируются без метаданных (posts.images)
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 80
+
+# Размеры миниатюр, которые готовятся в фоне после загрузки картинки;
+# первый используется в карточке поста
+POST_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# 0 — генерировать миниатюры синхронно
+THUMBNAIL_WORKERS = 2
+# Сколько помнить, что исходной картинки нет
+THUMBNAIL_MISSING_TIMEOUT = 60 * 10
+# Хранилище ключей sorl с LRU в памяти процесса (posts.kvstore)
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_KVSTORE_LRU_SIZE = 10000
+THUMBNAIL_KVSTORE_LRU_TIMEOUT = 60 * 5
 
 PAGINATOR_PAGES = 10
+# Наибольший limit страницы и число id в пакетном запросе JSON API
+API_MAX_LIMIT = 100
+# Комментарии на странице поста подгружаются пачками такого размера
+COMMENTS_PER_PAGE = 50
+# 'page' — нумерованные страницы, 'cursor' — навигация по ключу (pub_date, id)
+# без COUNT(*) и OFFSET; курсорный режим включается и параметром ?cursor=
+PAGINATOR_MODE = os.getenv('PAGINATOR_MODE', 'page')
+# Сколько последних записей отдают RSS- и Atom-ленты
+FEED_ITEMS = 20
+# Авторы с большим числом подписчиков не раскладываются по лентам
+# подписчиков, их посты подмешиваются в follow_index при чтении
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL = 200
+# Сколько первых id ленты подписок пользователя держать в кэше и как долго
+FOLLOW_FEED_CACHED_POSTS = PAGINATOR_PAGES * 5
+FOLLOW_FEED_CACHE_TIMEOUT = 60 * 60
+# Ленты с популярными авторами не сбрасываются на каждый их пост,
+# а живут в кэше недолго
+FOLLOW_FEED_PULLED_CACHE_TIMEOUT = 60
+
+# Метрики запросов (yatube.metrics): размер скользящего окна на каждое
+# представление и токен для /metrics (без него — только для staff)
+METRICS_WINDOW = 1000
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_COLLECTORS = ['posts.thumbnails.collect_metrics',
+                      'posts.cache.collect_metrics']
+
+# Контроль запросов (yatube.query_budget): сколько запросов к базе можно
+# представлениям из QUERY_BUDGET_MODULES и сколько повторов одной формы
+# запроса считать N+1. В тестах нарушение — исключение, иначе — лог.
+QUERY_BUDGET_MODULES = ['posts.views']
+QUERY_BUDGET_DEFAULT = 10
+# запись поста или подписки обновляет счётчики, ленты и поисковый индекс
+QUERY_BUDGETS = {
+    'new_post': 25,
+    'post_edit': 20,
+    'add_comment': 15,
+    'profile_follow': 20,
+    'profile_unfollow': 20,
+}
+NPLUSONE_THRESHOLD = 5
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'yatube.query_budget.TestRunner'
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -0,0 +1,81 @@
+"""
+Продакшен-режим SQLite (SQLITE_PRODUCTION).
+
+При каждом новом соединении выставляются прагмы SQLITE_PRAGMAS: журнал
+WAL (читатели не ждут писателя), synchronous=NORMAL, mmap, размер кэша
+страниц и busy_timeout, чтобы ожидание блокировки не сразу
+превращалось в «database is locked».
+
+Писатель в SQLite всё равно один, поэтому записи идут через serialized:
+в пределах процесса по очереди, а не толкаясь за блокировку базы, а если
+её держит другой процесс — попытка повторяется с растущей паузой.
+Представления, которые только пишут в базу, оборачиваются в
+serialized_write целиком; GET и HEAD таких представлений (форма до
+отправки) идут мимо очереди. Медленную работу вне базы (обработку и
+сохранение картинок) представление делает до очереди и передаёт в
+serialized только саму запись.
+"""
+import random
+import threading
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_write_lock = threading.Lock()
+
+
+def apply_pragmas(connection):
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite' and settings.SQLITE_PRODUCTION:
+        apply_pragmas(connection)
+
+
+def is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def serialized(func, *args, **kwargs):
+    """
+    Выполнить func в очереди записей процесса, в транзакции, с повтором
+    при занятой базе.
+    """
+    if not settings.SQLITE_PRODUCTION:
+        return func(*args, **kwargs)
+    retries = settings.SQLITE_WRITE_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            with _write_lock, transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if attempt == retries or not is_locked(error):
+                raise
+        # пауза — без блокировки, чтобы не задерживать другие записи;
+        # растёт вдвое, разброс разводит процессы
+        time.sleep(settings.SQLITE_WRITE_BACKOFF * 2 ** attempt
+                   * random.uniform(1, 1.5))
+
+
+def serialized_write(view=None, *, on_get=False):
+    """
+    Выполнить представление целиком через serialized. on_get=True — для
+    представлений, которые пишут и на GET (подписка по ссылке).
+    """
+    if view is None:
+        return partial(serialized_write, on_get=on_get)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD') and not on_get:
+            return view(request, *args, **kwargs)
+        return serialized(view, request, *args, **kwargs)
+    return wrapper
@@ -1,10 +1,11 @@
-import debug_toolbar
 from django.conf import settings
 from django.conf.urls import handler404, handler500
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from . import metrics
+
 handler404 = 'posts.views.page_not_found'
 handler500 = 'posts.views.server_error'
 
@@ -12,6 +13,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('metrics', metrics.metrics_view, name='metrics'),
+    path('api/v1/', include('posts.api_urls', namespace='api')),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]
@@ -20,4 +23,5 @@ if settings.DEBUG:
                           document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
+    import debug_toolbar
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
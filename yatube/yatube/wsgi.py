@@ -8,9 +8,16 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
 import os
+import threading
 
+from django.core.management import call_command
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Воркер прогревает свой кэш в фоне, не задерживая старт
+if os.getenv('WARM_CACHE_ON_STARTUP'):
+    threading.Thread(target=call_command, args=('warm_cache',),
+                     kwargs={'concurrency': 1}, daemon=True).start()